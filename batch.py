@@ -0,0 +1,178 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from glob import glob
+from multiprocessing import Pool
+
+import taskbin
+from dvfs import group_levels_energy
+from energy import group_energy, lower_bound
+from export import export_schedule
+from critical import (IncrementalCriticalGroupFinder, find_critical_group_numpy,
+                      find_critical_group_sweep)
+from scheduler import SchedulingError, edf_continuous, edf_events, load_tasks, solve
+
+FIELDS = ['filename', 'status', 'num_tasks', 'critical_groups', 'max_speed', 'energy',
+          'energy_lower_bound', 'discrete_energy', 'load_seconds', 'schedule_seconds']
+
+
+def find_task_files(sources):
+    """
+    Expands directories and glob patterns into a sorted list of task files.
+    """
+    filenames = set()
+    for source in sources:
+        if os.path.isdir(source):
+            for extension in ('*.txt', '*' + taskbin.EXTENSION):
+                filenames.update(glob(os.path.join(source, extension)))
+        else:
+            filenames.update(glob(source))
+    return sorted(filenames)
+
+
+def chart_names(filenames):
+    """
+    Returns a chart name for each task file: its path below the directory
+    holding all of them, with separators replaced and the extension kept,
+    so that case1.txt and case1.ydst or a/case1.txt and b/case1.txt get
+    different charts.
+    """
+    if not filenames:
+        return []
+    paths = [os.path.abspath(filename) for filename in filenames]
+    common = os.path.commonpath([os.path.dirname(path) for path in paths])
+    return [os.path.relpath(path, common).replace(os.sep, '_') + '.svg' for path in paths]
+
+
+def run_file(job):
+    """
+    Loads and schedules one task file, returning its summary row. A file
+    that cannot be loaded or scheduled gets an error status instead of
+    stopping the batch.
+    """
+    filename = job[0]
+    row = dict((field, None) for field in FIELDS)
+    row['filename'] = filename
+    try:
+        _fill_row(row, job)
+    except SchedulingError:
+        row['status'] = 'unschedulable'
+    except Exception as e:
+        row['status'] = 'error: {}: {}'.format(type(e).__name__, e)
+    return row
+
+
+def _fill_row(row, job):
+    filename, incremental, continuous, alpha, chart, levels, use_numpy = job
+    started = time.perf_counter()
+    if taskbin.is_task_binary(filename):
+        tasks, num_tasks = taskbin.load_tasks(filename)
+    else:
+        tasks, num_tasks = load_tasks(filename)
+    row['num_tasks'] = len(tasks)
+    row['load_seconds'] = time.perf_counter() - started
+
+    if incremental:
+        finder = IncrementalCriticalGroupFinder()
+    elif use_numpy:
+        finder = find_critical_group_numpy
+    else:
+        finder = find_critical_group_sweep
+    executor = edf_continuous if continuous else edf_events
+    started = time.perf_counter()
+    result = solve(tasks, finder=finder, executor=executor)
+    row['schedule_seconds'] = time.perf_counter() - started
+
+    row['status'] = 'ok'
+    row['critical_groups'] = len(result.groups)
+    row['max_speed'] = max([float(g) for g, group in result.groups] or [0])
+    # edf_events rounds run times down to whole time units, so its blocks
+    # can do less work than the tasks need and use less energy than the
+    # lower bound. The energies are those of the groups doing all their work.
+    row['energy'] = group_energy(result.groups, alpha)
+    row['energy_lower_bound'] = lower_bound(tasks, alpha)
+    if levels:
+        try:
+            row['discrete_energy'] = group_levels_energy(result.groups, levels, alpha)
+        except ValueError:
+            row['status'] = 'above highest level'
+
+    if chart and result.blocks:
+        export_schedule(result.blocks, len(tasks), chart)
+
+
+def run_batch(filenames, processes=None, incremental=False, continuous=False, alpha=3,
+              charts=None, levels=None, use_numpy=False):
+    """
+    Schedules every file across a process pool and returns the summary
+    rows in the order of filenames. With charts set, an SVG chart of each
+    schedule is written to that directory. With levels set, the energy of
+    each schedule mapped onto those discrete speed levels is reported too.
+    With use_numpy set, critical intervals are searched with NumPy.
+    """
+    if charts:
+        chart_files = [os.path.join(charts, name) for name in chart_names(filenames)]
+    else:
+        chart_files = [None] * len(filenames)
+    jobs = [(filename, incremental, continuous, alpha, chart, levels, use_numpy)
+            for filename, chart in zip(filenames, chart_files)]
+    # A few chunks per worker keeps the pool busy without per-file overhead
+    chunksize = max(1, len(jobs) // (4 * (processes or os.cpu_count() or 1)))
+    pool = Pool(processes)
+    try:
+        return pool.map(run_file, jobs, chunksize=chunksize)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def write_summary(rows, output):
+    if output.endswith('.json'):
+        with open(output, 'w') as file:
+            json.dump(rows, file, indent=2)
+    else:
+        with open(output, 'w') as file:
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Schedule many task files without a display.")
+    parser.add_argument('sources', nargs='+', help='Directories or glob patterns of task files')
+    parser.add_argument('-o', '--output', default='summary.csv',
+                        help='Summary file, written as JSON if it ends in .json and as CSV otherwise')
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help='Number of worker processes, all cores by default')
+    parser.add_argument('--alpha', type=float, default=3,
+                        help='Exponent of the power function used for the energy')
+    finders = parser.add_mutually_exclusive_group()
+    finders.add_argument('--incremental', action='store_true',
+                         help='Maintain critical intervals across rounds instead of searching from scratch')
+    finders.add_argument('--numpy', action='store_true',
+                         help='Search for critical intervals with NumPy array operations')
+    parser.add_argument('--continuous', action='store_true',
+                        help='Schedule in continuous time with exact fractional run times')
+    parser.add_argument('--charts', metavar='DIR',
+                        help='Also write an SVG chart of every schedule to this directory')
+    parser.add_argument('--levels', type=lambda s: [float(level) for level in s.split(',')],
+                        help='Comma separated discrete speed levels, e.g. 0.25,0.5,0.75,1')
+    args = parser.parse_args()
+
+    filenames = find_task_files(args.sources)
+    if not filenames:
+        print("No task files found")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    if args.charts and not os.path.isdir(args.charts):
+        os.makedirs(args.charts)
+    rows = run_batch(filenames, args.processes, args.incremental, args.continuous, args.alpha,
+                     args.charts, args.levels, args.numpy)
+    write_summary(rows, args.output)
+    print("Scheduled {} files in {:.2f}s, summary written to {}".format(len(rows),
+                                                                      time.perf_counter() - started,
+                                                                      args.output))
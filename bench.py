@@ -0,0 +1,170 @@
+"""
+Benchmarks of the scheduler stages on synthetic workloads.
+
+Each stage is timed on every workload and size, then run once more under
+tracemalloc to record its peak memory. Stages slower than their size limit
+allows, such as the O(n^3) reference critical group search, are skipped
+for larger sizes. Results can be saved as a JSON baseline and compared
+against later runs.
+"""
+from __future__ import division
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from critical import (IncrementalCriticalGroupFinder, find_critical_group_numpy,
+                      find_critical_group_sweep, numpy)
+from scheduler import (Task, edf, edf_events, find_critical_group, load_tasks, schedule,
+                       task_set_interval)
+from workloads import WORKLOADS, write_task_file
+
+SIZES = [10, 100, 1000, 10 ** 4, 10 ** 5, 10 ** 6]
+
+
+def _copy(tasks):
+    return [Task(t.name, t.a, t.b, t.r) for t in tasks]
+
+
+def _parse(tasks, directory):
+    filename = os.path.join(directory, "tasks.txt")
+    write_task_file(filename, tasks)
+    return lambda: load_tasks(filename)
+
+
+def _edf_reference(tasks, directory):
+    # edf() ticks through every time unit, so long horizons are skipped
+    a, b = task_set_interval(tasks)
+    if b - a > 10 ** 5:
+        return None
+    # and rounds the run times of the tasks it is given in place
+    return lambda: edf(set(_copy(tasks)), 1)
+
+
+def _critical_numpy(tasks, directory):
+    if numpy is None:
+        return None
+    return lambda: find_critical_group_numpy(tasks)
+
+
+def _schedule(finder):
+    def stage(tasks, directory):
+        return lambda: schedule(_copy(tasks), finder=finder())
+    return stage
+
+
+# Name, function returning the callable to time or None to skip the
+# workload, largest size to run at
+STAGES = [
+    ('parse', _parse, 10 ** 6),
+    ('critical_reference', lambda tasks, directory: lambda: find_critical_group(set(tasks)), 100),
+    ('critical_sweep', lambda tasks, directory: lambda: find_critical_group_sweep(tasks), 10 ** 4),
+    ('critical_numpy', _critical_numpy, 10 ** 4),
+    ('edf_reference', _edf_reference, 1000),
+    ('edf_events', lambda tasks, directory: lambda: edf_events(tasks, 1), 10 ** 6),
+    ('schedule', _schedule(lambda: find_critical_group_sweep), 1000),
+    ('schedule_incremental', _schedule(IncrementalCriticalGroupFinder), 1000),
+]
+
+
+def measure(run, repeat=1, memory=True):
+    """
+    Returns the best time of repeat calls to run and, if memory is set,
+    the peak memory allocated by one more call.
+    """
+    seconds = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return seconds, peak
+
+
+def run_benchmarks(workloads, sizes, stages=None, seed=0, repeat=1, memory=True, report=None):
+    """
+    Runs the named stages, all by default, on every workload and size and
+    returns a list of result rows. report is called with each row as soon
+    as it is measured.
+    """
+    results = []
+    directory = tempfile.mkdtemp()
+    try:
+        for workload in workloads:
+            for n in sizes:
+                tasks = WORKLOADS[workload](n, seed)
+                for name, stage, limit in STAGES:
+                    if (stages and name not in stages) or n > limit:
+                        continue
+                    run = stage(tasks, directory)
+                    if run is None:
+                        continue
+                    seconds, peak = measure(run, repeat, memory)
+                    row = {'workload': workload, 'num_tasks': n, 'stage': name,
+                           'seconds': seconds, 'peak_bytes': peak}
+                    results.append(row)
+                    if report is not None:
+                        report(row)
+    finally:
+        shutil.rmtree(directory)
+    return results
+
+
+def save_baseline(filename, results, seed):
+    with open(filename, 'w') as file:
+        json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                   'seed': seed, 'results': results}, file, indent=2)
+
+
+def load_baseline(filename):
+    with open(filename) as file:
+        baseline = json.load(file)
+    return dict(((row['workload'], row['num_tasks'], row['stage']), row)
+                for row in baseline['results'])
+
+
+def format_row(row, baseline=None):
+    line = "{:<13} {:>8} {:<21} {:>10.4f}s".format(row['workload'], row['num_tasks'],
+                                                   row['stage'], row['seconds'])
+    if row['peak_bytes'] is not None:
+        line += " {:>10.1f} KiB".format(row['peak_bytes'] / 1024)
+    if baseline:
+        before = baseline.get((row['workload'], row['num_tasks'], row['stage']))
+        if before and before['seconds']:
+            line += "  x{:.2f} vs baseline".format(before['seconds'] / row['seconds'])
+    return line
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scheduler on synthetic workloads.")
+    parser.add_argument('--workloads', nargs='+', choices=sorted(WORKLOADS), default=sorted(WORKLOADS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    parser.add_argument('--stages', nargs='+', choices=[name for name, stage, limit in STAGES],
+                        help='Stages to run, all by default')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help='Keep the best of this many runs')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Skip the extra run that measures peak memory')
+    parser.add_argument('--save', metavar='FILE', help='Write the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='FILE', help='Show speedups against a saved baseline')
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    results = run_benchmarks(args.workloads, args.sizes, args.stages, args.seed, args.repeat,
+                             not args.no_memory, lambda row: print(format_row(row, baseline)))
+    if args.save:
+        save_baseline(args.save, results, args.seed)
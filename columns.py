@@ -0,0 +1,137 @@
+from array import array
+
+from scheduler import SchedulingBlock, Task, parse_task_lines, read_header
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TaskTable(object):
+    """
+    Task set stored as one array per field instead of one object per task.
+
+    Iterating over the table yields Task objects, so it can be handed to
+    schedule() as is.
+    """
+
+    def __init__(self, names=None, a=None, b=None, r=None):
+        self.names = names if names is not None else []
+        self.a = a if a is not None else array('q')
+        self.b = b if b is not None else array('q')
+        self.r = r if r is not None else array('q')
+
+    @classmethod
+    def from_tasks(cls, tasks):
+        table = cls()
+        for task in tasks:
+            table.append(task.name, task.a, task.b, task.r)
+        return table
+
+    def append(self, name, a, b, r):
+        self.names.append(name)
+        self.a.append(int(a))
+        self.b.append(int(b))
+        self.r.append(int(r))
+
+    def task(self, i):
+        return Task(self.names[i], self.a[i], self.b[i], self.r[i])
+
+    def tasks(self):
+        return [self.task(i) for i in range(len(self))]
+
+    def as_numpy(self):
+        """
+        Returns the a, b and r columns as NumPy arrays sharing the table's
+        memory.
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for as_numpy()")
+        return dict((column, numpy.frombuffer(getattr(self, column), dtype=numpy.int64))
+                    for column in ('a', 'b', 'r'))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.task(i)
+
+
+def load_task_table(filename):
+    """
+    Loads tasks from the given file straight into a TaskTable.
+    """
+    table = TaskTable()
+    with open(filename, "r") as file:
+        num_tasks = read_header(file)
+        for name, a, b, r in parse_task_lines(file, num_tasks):
+            table.append(name, a, b, r)
+    return table, num_tasks
+
+
+class ScheduleTable(object):
+    """
+    Schedule stored as columns of task index, start, duration, speed and
+    core.
+
+    The tasks are kept in a TaskTable with the deadlines and releases they
+    had when scheduled. Iterating over the table yields SchedulingBlock
+    objects, so it can be handed to the plotter as is.
+    """
+
+    def __init__(self, tasks=None):
+        self.tasks = tasks if tasks is not None else TaskTable()
+        self.task = array('l')
+        self.start = array('d')
+        self.duration = array('d')
+        self.speed = array('d')
+        self.core = array('l')
+
+    @classmethod
+    def from_blocks(cls, f_schedule):
+        table = cls()
+        index = {}
+        for sb in f_schedule:
+            if sb.task not in index:
+                index[sb.task] = len(table.tasks)
+                table.tasks.append(sb.task.name, sb.task.a, sb.task.b, sb.task.r)
+            table.append(index[sb.task], sb.start, sb.duration, sb.execution_speed, sb.core)
+        return table
+
+    def append(self, task, start, duration, speed, core=0):
+        self.task.append(task)
+        self.start.append(float(start))
+        self.duration.append(float(duration))
+        self.speed.append(float(speed))
+        self.core.append(core)
+
+    def block(self, i):
+        return SchedulingBlock(self.tasks.task(self.task[i]), self.start[i],
+                               self.duration[i], self.speed[i], self.core[i])
+
+    def blocks(self):
+        tasks = self.tasks.tasks()
+        return [SchedulingBlock(tasks[self.task[i]], self.start[i],
+                                self.duration[i], self.speed[i], self.core[i])
+                for i in range(len(self))]
+
+    def as_numpy(self):
+        """
+        Returns the task, start, duration, speed and core columns as NumPy
+        arrays sharing the table's memory.
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for as_numpy()")
+        columns = dict((column, numpy.frombuffer(getattr(self, column), dtype=numpy.float64))
+                       for column in ('start', 'duration', 'speed'))
+        for column in ('task', 'core'):
+            columns[column] = numpy.frombuffer(getattr(self, column), dtype=numpy.dtype('l'))
+        return columns
+
+    def __len__(self):
+        return len(self.task)
+
+    def __iter__(self):
+        return iter(self.blocks())
@@ -0,0 +1,343 @@
+from __future__ import division
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Counters of the search, a dict with a 'candidates' count of the intervals
+# evaluated while a profiling.Profile is recorded and None otherwise
+counters = None
+
+
+def _last_positions(values):
+    positions = {}
+    for i, value in enumerate(values):
+        positions[value] = i
+    return positions
+
+
+def _first_positions(values):
+    positions = {}
+    for i, value in enumerate(values):
+        positions.setdefault(value, i)
+    return positions
+
+
+def find_critical_group_sweep(task_set):
+    """
+    Finds the critical group for a given task set in O(n^2).
+
+    Tasks are sorted by release once; releases are then swept from the
+    latest to the earliest while the work of every task released so far is
+    bucketed by deadline, so a single prefix sum over the deadlines gives
+    the contained work of each candidate interval. Returns the same speed
+    and group as scheduler.find_critical_group, including its tie-breaking.
+    """
+    tasks = list(task_set)
+    a_vals = [ti.a for ti in tasks]
+    b_vals = [ti.b for ti in tasks]
+
+    # The reference keeps the last interval of maximum intensity in its
+    # (a, b) iteration order, falling back to the first non-empty one.
+    a_last = _last_positions(a_vals)
+    b_last = _last_positions(b_vals)
+    a_first = _first_positions(a_vals)
+    b_first = _first_positions(b_vals)
+
+    b_keys = sorted(b_last)
+    b_index = dict((b, j) for j, b in enumerate(b_keys))
+    work = [0] * len(b_keys)
+    count = [0] * len(b_keys)
+
+    by_release = sorted(tasks, key=lambda x: x.a, reverse=True)
+    pos = 0
+
+    max_g = 0
+    best = None
+    best_key = None
+    first = None
+    first_key = None
+
+    for a in sorted(a_last, reverse=True):
+        while pos < len(by_release) and by_release[pos].a >= a:
+            j = b_index[by_release[pos].b]
+            work[j] += by_release[pos].r
+            count[j] += 1
+            pos += 1
+
+        if counters is not None:
+            counters['candidates'] += len(b_keys)
+        acc = 0
+        cnt = 0
+        for j, b in enumerate(b_keys):
+            acc += work[j]
+            cnt += count[j]
+            if b <= a or not cnt:
+                continue
+            key = (a_first[a], b_first[b])
+            if first_key is None or key < first_key:
+                first, first_key = (a, b), key
+            g_val = acc / (b - a)
+            if g_val > 1 or g_val < max_g:
+                continue
+            key = (a_last[a], b_last[b])
+            if g_val > max_g or best_key is None or key > best_key:
+                max_g = g_val
+                best, best_key = (a, b), key
+
+    if best is None:
+        best = first
+    a, b = best
+    return max_g, set(task for task in tasks if task.a >= a and task.b <= b)
+
+
+def find_critical_group_numpy(task_set, max_cells=1 << 20):
+    """
+    Finds the critical group for a given task set with NumPy.
+
+    The work of the tasks is binned on the grid of distinct releases by
+    distinct deadlines, and cumulative sums over the grid give the work
+    contained in every candidate interval, whose intensities are then
+    compared with array operations. The grid is processed a block of rows
+    at a time, from the latest release down, so that no more than
+    max_cells intervals are held at once. Returns the same speed and group
+    as find_critical_group_sweep.
+    """
+    if numpy is None:
+        raise ImportError("NumPy is required for find_critical_group_numpy()")
+    tasks = list(task_set)
+    n = len(tasks)
+    a_vals = [ti.a for ti in tasks]
+    b_vals = [ti.b for ti in tasks]
+
+    a_last = _last_positions(a_vals)
+    b_last = _last_positions(b_vals)
+    a_first = _first_positions(a_vals)
+    b_first = _first_positions(b_vals)
+
+    a_keys = numpy.array(sorted(a_last), dtype=numpy.int64)
+    b_keys = numpy.array(sorted(b_last), dtype=numpy.int64)
+    na, nb = len(a_keys), len(b_keys)
+    # Tie-breaking keys of the reference, see find_critical_group_sweep
+    a_last_key = numpy.array([a_last[a] for a in a_keys.tolist()], dtype=numpy.int64) * n
+    b_last_key = numpy.array([b_last[b] for b in b_keys.tolist()], dtype=numpy.int64)
+    a_first_key = numpy.array([a_first[a] for a in a_keys.tolist()], dtype=numpy.int64) * n
+    b_first_key = numpy.array([b_first[b] for b in b_keys.tolist()], dtype=numpy.int64)
+
+    # Grid cell of every task, ordered by release
+    row = numpy.searchsorted(a_keys, numpy.array(a_vals, dtype=numpy.int64))
+    col = numpy.searchsorted(b_keys, numpy.array(b_vals, dtype=numpy.int64))
+    r = numpy.array([ti.r for ti in tasks], dtype=numpy.int64)
+    order = numpy.argsort(row, kind='stable')
+    row, col, r = row[order], col[order], r[order]
+
+    # Work and task count of the tasks released after the current block,
+    # by deadline
+    carry_work = numpy.zeros(nb, dtype=numpy.int64)
+    carry_count = numpy.zeros(nb, dtype=numpy.int64)
+
+    best = None
+    first = None
+    rows = max(1, max_cells // max(1, nb))
+    for end in range(na, 0, -rows):
+        start = max(0, end - rows)
+        lo, hi = numpy.searchsorted(row, [start, end])
+        cells = (row[lo:hi] - start) * nb + col[lo:hi]
+        work = numpy.zeros((end - start) * nb, dtype=numpy.int64)
+        count = numpy.zeros((end - start) * nb, dtype=numpy.int64)
+        numpy.add.at(work, cells, r[lo:hi])
+        numpy.add.at(count, cells, 1)
+        work = work.reshape(end - start, nb)
+        count = count.reshape(end - start, nb)
+
+        # Tasks released at or after each row, then due by each deadline
+        work = numpy.cumsum(work[::-1], axis=0)[::-1] + carry_work
+        count = numpy.cumsum(count[::-1], axis=0)[::-1] + carry_count
+        carry_work = work[0].copy()
+        carry_count = count[0].copy()
+        work = numpy.cumsum(work, axis=1)
+        count = numpy.cumsum(count, axis=1)
+        if counters is not None:
+            counters['candidates'] += work.size
+
+        length = b_keys[None, :] - a_keys[start:end, None]
+        valid = (length > 0) & (count > 0)
+        if not valid.any():
+            continue
+
+        keys = a_first_key[start:end, None] + b_first_key[None, :]
+        i, j = numpy.unravel_index(numpy.argmin(numpy.where(valid, keys, n * n)), keys.shape)
+        if first is None or keys[i, j] < first[0]:
+            first = (keys[i, j], start + i, j)
+
+        g = numpy.where(valid, work / numpy.where(valid, length, 1), numpy.inf)
+        g[g > 1] = -1
+        g_max = g.max()
+        if g_max < 0:
+            continue
+        keys = numpy.where(g == g_max, a_last_key[start:end, None] + b_last_key[None, :], -1)
+        i, j = numpy.unravel_index(numpy.argmax(keys), keys.shape)
+        if best is None or (g_max, keys[i, j]) > best[:2]:
+            best = (g_max, keys[i, j], start + i, j)
+
+    if best is None:
+        max_g = 0
+        a, b = int(a_keys[first[1]]), int(b_keys[first[2]])
+    else:
+        max_g = float(best[0])
+        a, b = int(a_keys[best[2]]), int(b_keys[best[3]])
+    return max_g, set(task for task in tasks if task.a >= a and task.b <= b)
+
+
+class IncrementalCriticalGroupFinder:
+    """
+    Critical group engine that keeps its state between calls.
+
+    The most intense intervals starting at every release point are cached
+    per row of the compressed time points. On each call the task set is
+    compared with the previous one and only the rows at or before the
+    latest release touched by a removed, added or revised task are
+    rescanned, as intervals starting after it cannot have changed.
+
+    A round still costs O(n^2) in the worst case: revising the tasks around
+    a critical interval touches every row before its end, which is usually
+    most of them. The saving is the rows after it, about 2x on uniform
+    workloads. Ties are resolved with the keys of find_critical_group_sweep,
+    so the speed and group are always the same as the sweep's.
+    """
+
+    def __init__(self):
+        self.points = None
+
+    def _rebuild(self, task_set):
+        points = set()
+        for task in task_set:
+            points.add(task.a)
+            points.add(task.b)
+        self.points = sorted(points)
+        self.point_index = dict((p, i) for i, p in enumerate(self.points))
+        self.row_tasks = [set() for _ in self.points]
+        self.col_count = [0] * len(self.points)
+        self.snapshot = {}
+        for task in task_set:
+            self._insert(task)
+        # Per row, the highest intensity of at most 1 and the deadlines
+        # reaching it, or None for a row without candidates
+        self.row_best = [None] * len(self.points)
+
+    def _insert(self, task):
+        """
+        Adds a task and returns the latest release point it affects.
+        """
+        j = self.point_index[task.b]
+        self.row_tasks[self.point_index[task.a]].add(task)
+        self.col_count[j] += 1
+        self.snapshot[task] = (task.a, task.b, task.r)
+        # A deadline that becomes a candidate matters to every earlier row
+        return task.b if self.col_count[j] == 1 else task.a
+
+    def _remove(self, task):
+        """
+        Drops a task and returns the latest release point it affects.
+        """
+        a, b, r = self.snapshot.pop(task)
+        j = self.point_index[b]
+        self.row_tasks[self.point_index[a]].discard(task)
+        self.col_count[j] -= 1
+        return b if not self.col_count[j] else a
+
+    def _apply_changes(self, task_set):
+        """
+        Brings the snapshot up to date and returns the latest affected
+        release point, or None if nothing changed.
+        """
+        latest = float("-inf")
+        changed = [t for t in self.snapshot if t not in task_set]
+        changed += [t for t in task_set
+                    if self.snapshot.get(t) != (t.a, t.b, t.r)]
+
+        for task in changed:
+            if task.a not in self.point_index or task.b not in self.point_index:
+                return float("inf")
+
+        for task in changed:
+            if task in self.snapshot:
+                latest = max(latest, self._remove(task))
+            if task in task_set:
+                latest = max(latest, self._insert(task))
+        return latest if changed else None
+
+    def _recompute(self, latest):
+        m = len(self.points)
+        work = [0] * m
+        count = [0] * m
+        total = 0
+
+        for i in range(m - 1, -1, -1):
+            for task in self.row_tasks[i]:
+                j = self.point_index[task.b]
+                work[j] += task.r
+                count[j] += 1
+                total += task.r
+            if self.points[i] > latest:
+                continue
+
+            best = None
+            if self.row_tasks[i]:
+                a = self.points[i]
+                acc = work[i]
+                cnt = count[i]
+                best_g = -1
+                ties = []
+                j = i
+                for j in range(i + 1, m):
+                    b = self.points[j]
+                    # No later deadline can beat the best interval so far
+                    if total / (b - a) < best_g:
+                        break
+                    acc += work[j]
+                    cnt += count[j]
+                    if not cnt or not self.col_count[j]:
+                        continue
+                    g_val = acc / (b - a)
+                    if g_val > 1 or g_val < best_g:
+                        continue
+                    if g_val > best_g:
+                        best_g = g_val
+                        ties = []
+                    ties.append(b)
+                if counters is not None:
+                    counters['candidates'] += j - i
+                if ties:
+                    best = (best_g, ties)
+            self.row_best[i] = best
+
+    def __call__(self, task_set):
+        if self.points is None:
+            latest = float("inf")
+        else:
+            latest = self._apply_changes(task_set)
+        if latest == float("inf"):
+            self._rebuild(task_set)
+        if latest is not None:
+            self._recompute(latest)
+
+        g = max(best[0] for best in self.row_best if best is not None) if any(self.row_best) else -1
+        if g < 0:
+            # Every interval is overloaded, defer to the sweep which
+            # reports the same group as the reference
+            return find_critical_group_sweep(task_set)
+
+        # Break ties on the positions in task_set like the sweep does
+        tasks = list(task_set)
+        a_last = _last_positions([ti.a for ti in tasks])
+        b_last = _last_positions([ti.b for ti in tasks])
+        a, b = max(((self.points[i], b) for i, best in enumerate(self.row_best)
+                    if best is not None and best[0] == g for b in best[1]),
+                   key=lambda x: (a_last[x[0]], b_last[x[1]]))
+
+        group = set()
+        for i in range(self.point_index[a], self.point_index[b] + 1):
+            group.update(t for t in self.row_tasks[i] if t.b <= b)
+        return g, group
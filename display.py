@@ -1,110 +1,108 @@
 import argparse
-from graphics import *
-from scheduler import load_tasks, schedule, task_set_interval
-from math import ceil
+from scheduler import SchedulingError, edf_continuous, edf_events, load_tasks, schedule, task_set_interval
+from critical import (IncrementalCriticalGroupFinder, find_critical_group_numpy,
+                      find_critical_group_sweep)
+import taskbin
 
 
-def plot_tasks(tasks):
-    schedule = []
-    elapsed = 0
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("{} is not a positive integer".format(value))
+    return number
 
-    for task in tasks:
-        if task.a > elapsed:
-            schedule.append((task, task.a, task.r, 1))
-            elapsed += (task.a - elapsed)
-        else:
-            schedule.append((task, elapsed, task.r, 1))
-            elapsed += task.r + task.a
-
-    plotter = SchedulePlotter(schedule)
-    plotter.draw_schedule()
-
-
-class SchedulePlotter:
-    def __init__(self, schedule, num_tasks, max_x=100, max_y=100):
-        self.schedule = schedule
-        self.max_x = max_x
-        self.max_y = max_y
-        self._get_schedule_interval()
-        self.window = GraphWin(width=800, height=600)
-        self.window.setCoords(0, 0, self.max_x, self.max_y)
-        self.margin = 4
-        self.num_tasks = num_tasks
-
-    def _get_schedule_interval(self):
-        self.schedule.sort(key=lambda x: x.start)
-        max_time = self.schedule[-1].task.b
-        min_time = self.schedule[0].start
-        self.schedule_start = min_time
-        self.schedule_end = max_time
-
-    def draw_schedule(self):
-        x_axis = Line(Point(self.margin, self.margin), Point(self.max_x - self.margin, self.margin))
-        y_axis = Line(Point(self.margin, self.margin), Point(self.margin, self.max_y - self.margin))
-
-        interval = (self.max_x - 2*self.margin) / self.schedule_end
-        spacing = self.max_x / self.num_tasks
 
-        step = int(self.schedule_end / 5)
-
-        for z in range(0, int(ceil(self.schedule_end)) + 1, step):
-            pa = Point((z * interval) + self.margin, self.margin-1.5)
-            tick_label = Text(pa, str(z))
-            tick_label.draw(self.window)
-
-        i = 0
-        self.schedule.sort(key=lambda x: x.task.name, reverse=True)
-        last_block = self.schedule[0].task.name
-
-        for sb in self.schedule:
-            if sb.task.name != last_block:
-                i += 1
-                last_block = sb.task.name
-            deadline = sb.task.b
-            release = sb.task.a
-            dla = Point((deadline * interval) + self.margin, i * spacing + self.margin)
-            dlb = Point((deadline * interval) + self.margin, (i * spacing) + (spacing / self.margin) + self.margin)
-            ra = Point((release * interval) + self.margin, i * spacing + self.margin)
-            rb = Point((release * interval) + self.margin, (i * spacing) + (spacing / self.margin) + self.margin)
-
-            release_l = Line(ra, rb)
-            color_rgb(0, 0, 255)
-            release_l.setFill('green')
-            release_l.setArrow('last')
-            release_l.draw(self.window)
-            deadline_l = Line(dla, dlb)
-            deadline_l.setFill('black')
-            deadline_l.setArrow('first')
-            deadline_l.draw(self.window)
-
-            label = Text(Point(self.margin-2, (i * spacing) + (spacing / self.margin) + 4) , sb.task.name)
-            label.draw(self.window)
-            bl = Point(self.margin + (sb.start * interval), i * spacing + self.margin)
-            ur = Point(self.margin + ((sb.start * interval) + (sb.duration * interval)), (i * spacing) + (spacing / self.margin) + self.margin)
-            rect = Rectangle(bl, ur)
-            rect_color = color_rgb(int(255 * sb.execution_speed), int(255 * (1 - sb.execution_speed)), 0)
-            rect.setFill(rect_color)
-            rect.draw(self.window)
-            l = Line(Point(self.margin, i * spacing + self.margin), Point(self.max_x - 1, i * spacing + self.margin))
-            l.draw(self.window)
-        x_axis.draw(self.window)
-        y_axis.draw(self.window)
-        self.window.getMouse()
+def print_round(g, critical_group, blocks):
+    print("#" * 20)
+    print("Critical Group {} \t{}\n".format(g, critical_group))
+    if blocks is None:
+        print("Error: Task(s) {} is/are unschedulable".format(critical_group))
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Simulation of a low power scheduling algorithm.")
     parser.add_argument('filename', type=str, help='Name of input file')
+    finders = parser.add_mutually_exclusive_group()
+    finders.add_argument('--incremental', action='store_true',
+                         help='Maintain critical intervals across rounds instead of searching from scratch')
+    finders.add_argument('--numpy', action='store_true',
+                         help='Search for critical intervals with NumPy array operations')
+    parser.add_argument('--continuous', action='store_true',
+                        help='Schedule in continuous time with exact fractional run times')
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument('--online', choices=['avr', 'oa'],
+                       help='Schedule the tasks online as they arrive, with Average Rate or Optimal Available')
+    modes.add_argument('--cores', type=positive_int,
+                       help='Schedule on this many processors with migration, one chart row per processor')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='Record the scheduling rounds to a .json file or folded flame graph stacks')
+    parser.add_argument('--no-plot', action='store_true',
+                        help='Only print the schedule, without opening a window')
+    parser.add_argument('--export', metavar='FILE',
+                        help='Write the chart to an .svg or .png file instead of opening a window')
+    parser.add_argument('--viewer', action='store_true',
+                        help='Open the chart in a window that can be zoomed and panned')
     args = parser.parse_args()
-    tasks, num_tasks = load_tasks(args.filename)
+    if args.cores or args.online:
+        # Only the single processor offline scheduler uses these
+        for flag in ('incremental', 'numpy', 'continuous', 'profile'):
+            if getattr(args, flag):
+                parser.error("--{} cannot be used with --{}".format(
+                    flag, 'cores' if args.cores else 'online'))
+    try:
+        if taskbin.is_task_binary(args.filename):
+            tasks, num_tasks = taskbin.load_tasks(args.filename)
+        else:
+            tasks, num_tasks = load_tasks(args.filename)
+    except ValueError as e:
+        parser.exit(1, "Error: {}\n".format(e))
     a, b = task_set_interval(tasks)
 
-    s = schedule(tasks)
+    if args.incremental:
+        finder = IncrementalCriticalGroupFinder()
+    elif args.numpy:
+        finder = find_critical_group_numpy
+    else:
+        finder = find_critical_group_sweep
+    executor = edf_continuous if args.continuous else edf_events
+    if args.cores:
+        from multicore import schedule_multicore
+        try:
+            s = schedule_multicore(tasks, args.cores).blocks
+        except SchedulingError as e:
+            parser.exit(1, "Error: {}\n".format(e))
+    elif args.online:
+        from online import POLICIES
+        s = list(POLICIES[args.online](sorted(tasks, key=lambda x: x.a)))
+    else:
+        if args.profile:
+            from profiling import profiling
+            with profiling() as profile:
+                s = schedule(tasks, finder=finder, executor=executor, on_round=print_round)
+            if args.profile.endswith('.json'):
+                profile.write_json(args.profile)
+            else:
+                profile.write_folded(args.profile)
+        else:
+            s = schedule(tasks, finder=finder, executor=executor, on_round=print_round)
+        if not s.feasible:
+            # The unschedulable groups were reported by print_round
+            parser.exit(1)
     for t in s:
         print("Schedule task {0} at time {1:.2f} for {2:.2f}"
               " time units with {3:.2f}% processing speed".format(t.task.name,
-                                                                  t.start,
-                                                                  t.duration,
-                                                                  t.execution_speed * 100))
-    plotter = SchedulePlotter(s, num_tasks)
-    plotter.draw_schedule()
+                                                                  float(t.start),
+                                                                  float(t.duration),
+                                                                  float(t.execution_speed) * 100)
+              + (" on core {}".format(t.core) if args.cores else ""))
+    if args.export:
+        from export import export_schedule
+        export_schedule(s, num_tasks, args.export, cores=args.cores)
+    elif args.viewer:
+        from viewer import ScheduleViewer
+        ScheduleViewer(s, num_tasks, cores=args.cores).run()
+    elif not args.no_plot:
+        # Imported here so that printing the schedule never needs Tk
+        from plotter import SchedulePlotter
+        plotter = SchedulePlotter(s, num_tasks, cores=args.cores)
+        plotter.draw_schedule()
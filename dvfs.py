@@ -0,0 +1,137 @@
+"""
+Mapping of continuous schedules onto discrete speed levels.
+
+Processors with dynamic voltage and frequency scaling only run at a few
+speeds. A block at a speed s between two neighbouring levels lo < s < hi is
+split into a part at hi followed by a part at lo, with the time divided so
+that the same work is done in the same time:
+
+    d_hi = d * (s - lo) / (hi - lo),    d_lo = d - d_hi
+
+which is the cheapest way to do that work in that time for a convex power
+function. Speeds below the lowest level run at the lowest level and then
+idle, idling being a level of speed 0.
+"""
+from __future__ import division
+
+from bisect import bisect_left
+
+from energy import as_power
+from scheduler import SchedulingBlock
+
+
+class LevelMapping(object):
+    """
+    Outcome of map_to_levels(): the blocks run at the discrete levels and
+    the energy of the schedule before and after mapping.
+    """
+
+    def __init__(self):
+        self.blocks = []
+        self.energy = 0
+        self.continuous_energy = 0
+
+    @property
+    def penalty(self):
+        """
+        Extra energy spent because of the discrete levels.
+        """
+        return self.energy - self.continuous_energy
+
+
+class SpeedLevels(object):
+    """
+    A sorted set of speed levels, remembering how each speed seen so far
+    is split between its neighbouring levels.
+    """
+
+    def __init__(self, levels):
+        self.levels = sorted(set(level for level in levels if level > 0))
+        if not self.levels:
+            raise ValueError("At least one positive speed level is required")
+        # Idling is always possible
+        self.levels.insert(0, 0)
+        self._splits = {}
+
+    def split(self, speed):
+        """
+        Returns the neighbouring levels (lo, hi) of speed and the fraction
+        of the time to spend at hi.
+        """
+        try:
+            return self._splits[speed]
+        except KeyError:
+            pass
+
+        if speed > self.levels[-1]:
+            raise ValueError("Speed {} is above the highest level {}".format(speed, self.levels[-1]))
+        i = bisect_left(self.levels, speed)
+        hi = self.levels[i]
+        if hi == speed:
+            split = (hi, hi, 1)
+        else:
+            lo = self.levels[i - 1]
+            split = (lo, hi, (speed - lo) / (hi - lo))
+        self._splits[speed] = split
+        return split
+
+
+def map_to_levels(f_schedule, levels, power=None):
+    """
+    Maps every block of the schedule onto the given speed levels, in one
+    pass over the blocks.
+
+    levels is a list of speeds or a SpeedLevels instance, which can be
+    reused to keep its splits across schedules. power is the power function
+    used for the energies, see energy.as_power. Raises ValueError if a block
+    runs faster than the highest level.
+    """
+    if not isinstance(levels, SpeedLevels):
+        levels = SpeedLevels(levels)
+    power = as_power(power)
+    powers = {}
+
+    def block_power(speed):
+        if speed not in powers:
+            powers[speed] = power(speed)
+        return powers[speed]
+
+    mapping = LevelMapping()
+    for sb in f_schedule:
+        speed = sb.execution_speed
+        mapping.continuous_energy += float(sb.duration * block_power(speed))
+
+        lo, hi, fraction = levels.split(speed)
+        high = sb.duration * fraction
+        low = sb.duration - high
+        if high and hi:
+            mapping.blocks.append(SchedulingBlock(sb.task, sb.start, high, hi, sb.core))
+            mapping.energy += float(high * block_power(hi))
+        if low and lo:
+            mapping.blocks.append(SchedulingBlock(sb.task, sb.start + high, low, lo, sb.core))
+            mapping.energy += float(low * block_power(lo))
+    return mapping
+
+
+def group_levels_energy(groups, levels, power=None):
+    """
+    Returns the energy of running every critical group, given as (speed,
+    tasks) pairs, for exactly its work on the given speed levels, as
+    map_to_levels would for any schedule of the groups that does all
+    their work. Raises ValueError if a group runs faster than the highest
+    level.
+    """
+    if not isinstance(levels, SpeedLevels):
+        levels = SpeedLevels(levels)
+    power = as_power(power)
+    total = 0
+    for g, group in groups:
+        if not g:
+            continue
+        duration = sum(task.r for task in group) / g
+        lo, hi, fraction = levels.split(g)
+        if hi:
+            total += float(duration * fraction * power(hi))
+        if lo and fraction != 1:
+            total += float(duration * (1 - fraction) * power(lo))
+    return total
@@ -0,0 +1,196 @@
+"""
+Energy accounting for computed schedules.
+
+A processor running at speed s draws power P(s), by default s ** 3, so a
+block of duration d at speed s uses d * P(s) energy. Schedules can be given
+as lists of SchedulingBlocks or as a columns.ScheduleTable, which is scored
+with NumPy when it is installed.
+"""
+from __future__ import division
+
+from columns import ScheduleTable
+from critical import find_critical_group_sweep
+from scheduler import task_set_interval
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class PowerFunction(object):
+    """
+    Power drawn at a given speed: speed ** alpha, or function(speed) for a
+    custom convex power function. Custom functions written with arithmetic
+    operators or NumPy ufuncs are evaluated on whole columns at once.
+    """
+
+    def __init__(self, alpha=3, function=None):
+        self.alpha = alpha
+        self.function = function
+
+    def __call__(self, speed):
+        if self.function is not None:
+            return self.function(speed)
+        return speed ** self.alpha
+
+    def evaluate(self, speeds):
+        """
+        Returns the power at every speed of a NumPy array.
+        """
+        if self.function is None:
+            return speeds ** self.alpha
+        try:
+            power = numpy.asarray(self.function(speeds), dtype=numpy.float64)
+        except (TypeError, ValueError):
+            power = None
+        if power is None or power.shape != speeds.shape:
+            power = numpy.fromiter((self.function(s) for s in speeds.tolist()),
+                                   dtype=numpy.float64, count=len(speeds))
+        return power
+
+    def __repr__(self):
+        if self.function is not None:
+            return "PowerFunction(function={!r})".format(self.function)
+        return "PowerFunction(alpha={!r})".format(self.alpha)
+
+
+def as_power(power):
+    """
+    Turns an exponent, a callable or None (cubic power) into a
+    PowerFunction.
+    """
+    if power is None:
+        return PowerFunction()
+    if isinstance(power, PowerFunction):
+        return power
+    if callable(power):
+        return PowerFunction(function=power)
+    return PowerFunction(alpha=power)
+
+
+def _numpy_columns(f_schedule):
+    if numpy is not None and isinstance(f_schedule, ScheduleTable):
+        columns = f_schedule.as_numpy()
+        return columns['start'], columns['duration'], columns['speed']
+    return None
+
+
+def _columns(f_schedule):
+    """
+    Yields the start, duration and speed of every block as floats.
+    """
+    if isinstance(f_schedule, ScheduleTable):
+        return zip(f_schedule.start, f_schedule.duration, f_schedule.speed)
+    return ((float(sb.start), float(sb.duration), float(sb.execution_speed))
+            for sb in f_schedule)
+
+
+def energy(f_schedule, power=None):
+    """
+    Returns the total energy of the schedule, the sum of duration * P(speed)
+    over its blocks.
+    """
+    power = as_power(power)
+    columns = _numpy_columns(f_schedule)
+    if columns is not None:
+        start, duration, speed = columns
+        return float(numpy.dot(duration, power.evaluate(speed)))
+    return sum(duration * power(speed) for start, duration, speed in _columns(f_schedule))
+
+
+def peak_speed(f_schedule):
+    columns = _numpy_columns(f_schedule)
+    if columns is not None:
+        speed = columns[2]
+        return float(speed.max()) if len(speed) else 0
+    return max([speed for start, duration, speed in _columns(f_schedule)] or [0])
+
+
+def total_work(f_schedule):
+    """
+    Returns the work done by the schedule, the sum of duration * speed.
+    """
+    columns = _numpy_columns(f_schedule)
+    if columns is not None:
+        start, duration, speed = columns
+        return float(numpy.dot(duration, speed))
+    return sum(duration * speed for start, duration, speed in _columns(f_schedule))
+
+
+def speed_profile(f_schedule):
+    """
+    Returns the processor speed over time as a list of (time, speed)
+    steps, each speed holding until the time of the next step. Speeds of
+    overlapping blocks add up, and the last step drops back to 0.
+    """
+    changes = {}
+    for sb in f_schedule:
+        end = sb.start + sb.duration
+        changes[sb.start] = changes.get(sb.start, 0) + sb.execution_speed
+        changes[end] = changes.get(end, 0) - sb.execution_speed
+
+    profile = []
+    speed = 0
+    for t in sorted(changes):
+        speed += changes[t]
+        if not profile or profile[-1][1] != speed:
+            profile.append((t, speed))
+    return profile
+
+
+def lower_bound(task_set, power=None):
+    """
+    Returns a lower bound on the energy of any feasible schedule of the
+    task set, for a convex power function with P(0) = 0.
+
+    All the work must be done within the span of the task set, and the
+    work of the tasks contained in any interval within that interval, so
+    running either at its average speed throughout is never beaten. The
+    interval used is the critical interval of find_critical_group_sweep:
+    the densest one of intensity at most 1, or its fallback when every
+    interval is denser, so the bound is not always the tightest.
+    """
+    power = as_power(power)
+    tasks = list(task_set)
+    if not tasks:
+        return 0
+    a, b = task_set_interval(tasks)
+    work = sum(ti.r for ti in tasks)
+    bound = (b - a) * power(work / (b - a)) if b > a else 0
+
+    g, group = find_critical_group_sweep(tasks)
+    if g > 0:
+        group_work = sum(ti.r for ti in group)
+        bound = max(bound, group_work / g * power(g))
+    return float(bound)
+
+
+def group_energy(groups, power=None):
+    """
+    Returns the energy of running every critical group, given as (speed,
+    tasks) pairs, at its speed for exactly its work, which is the energy
+    of any schedule that does all the work of the groups at those speeds.
+    """
+    power = as_power(power)
+    total = 0
+    for g, group in groups:
+        if g:
+            total += sum(task.r for task in group) / g * power(g)
+    return float(total)
+
+
+def summarize(f_schedule, power=None):
+    """
+    Returns the energy, peak speed, work and busy time of the schedule.
+    """
+    power = as_power(power)
+    columns = _numpy_columns(f_schedule)
+    if columns is not None:
+        busy = float(columns[1].sum())
+    else:
+        busy = sum(duration for start, duration, speed in _columns(f_schedule))
+    return {'energy': energy(f_schedule, power),
+            'peak_speed': peak_speed(f_schedule),
+            'work': total_work(f_schedule),
+            'busy_time': busy}
@@ -0,0 +1,216 @@
+"""
+Writes schedule charts to SVG or PNG files without Tk.
+
+The chart items of a ScheduleLayout are streamed straight to the output:
+SVG elements are written as they are produced, and PNG images are
+rasterised item by item with Pillow when it is installed, or with a small
+pure-Python rasteriser otherwise, which leaves out the text labels.
+"""
+from __future__ import division
+
+import os
+import struct
+import zlib
+
+from layout import ScheduleLayout
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = None
+
+# Tk's default arrow head, as length and half-width in pixels
+ARROW_LENGTH = 8
+ARROW_WIDTH = 3
+FONT_SIZE = 12
+
+# Named colours used by the layout, with the values Tk gives them
+COLORS = {'black': (0, 0, 0), 'white': (255, 255, 255), 'green': (0, 255, 0)}
+
+
+def _rgb(color):
+    if color.startswith('#'):
+        return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return COLORS[color]
+
+
+def _hex(color):
+    return "#%02x%02x%02x" % _rgb(color)
+
+
+def _escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _pixels(layout, width, height):
+    """
+    Yields the layout items with coordinates converted to pixels, y down.
+    """
+    sx = width / layout.max_x
+    sy = height / layout.max_y
+    for item in layout.items():
+        kind = item[0]
+        if kind == 'text':
+            yield (kind, item[1] * sx, height - item[2] * sy) + item[3:]
+        else:
+            x1, y1, x2, y2 = item[1:5]
+            yield (kind, x1 * sx, height - y1 * sy, x2 * sx, height - y2 * sy) + item[5:]
+
+
+def _arrow_head(x1, y1, x2, y2):
+    """
+    Returns the triangle of an arrow head pointing at (x2, y2).
+    """
+    length = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5 or 1
+    dx, dy = (x2 - x1) / length, (y2 - y1) / length
+    bx, by = x2 - dx * ARROW_LENGTH, y2 - dy * ARROW_LENGTH
+    return [(x2, y2), (bx - dy * ARROW_WIDTH, by + dx * ARROW_WIDTH),
+            (bx + dy * ARROW_WIDTH, by - dx * ARROW_WIDTH)]
+
+
+def _arrow_heads(x1, y1, x2, y2, arrow):
+    if arrow in ('last', 'both'):
+        yield _arrow_head(x1, y1, x2, y2)
+    if arrow in ('first', 'both'):
+        yield _arrow_head(x2, y2, x1, y1)
+
+
+def write_svg(layout, filename, width=800, height=600):
+    with open(filename, 'w') as file:
+        file.write('<svg xmlns="http://www.w3.org/2000/svg" width="{0}" height="{1}" '
+                   'viewBox="0 0 {0} {1}">\n'.format(width, height))
+        file.write('<rect width="100%" height="100%" fill="white"/>\n')
+        for item in _pixels(layout, width, height):
+            kind = item[0]
+            if kind == 'rect':
+                x1, y1, x2, y2, fill, outline = item[1:]
+                file.write('<rect x="{:.2f}" y="{:.2f}" width="{:.2f}" height="{:.2f}" '
+                           'fill="{}" stroke="{}"/>\n'.format(min(x1, x2), min(y1, y2),
+                                                              abs(x2 - x1), abs(y2 - y1),
+                                                              _hex(fill), _hex(outline) if outline else 'none'))
+            elif kind == 'line':
+                x1, y1, x2, y2, color, arrow = item[1:]
+                file.write('<line x1="{:.2f}" y1="{:.2f}" x2="{:.2f}" y2="{:.2f}" '
+                           'stroke="{}"/>\n'.format(x1, y1, x2, y2, _hex(color)))
+                for head in _arrow_heads(x1, y1, x2, y2, arrow):
+                    file.write('<polygon points="{}" fill="{}"/>\n'.format(
+                        ' '.join('{:.2f},{:.2f}'.format(x, y) for x, y in head), _hex(color)))
+            else:
+                x, y, text = item[1:]
+                file.write('<text x="{:.2f}" y="{:.2f}" font-family="Helvetica" font-size="{}" '
+                           'text-anchor="middle" dominant-baseline="central">{}</text>\n'.format(
+                               x, y, FONT_SIZE, _escape(text)))
+        file.write('</svg>\n')
+
+
+class _Raster(object):
+    """
+    Minimal RGB raster used to write PNG files when Pillow is missing. Its
+    drawing methods take the same arguments as Pillow's ImageDraw.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(b'\xff' * (width * height * 3))
+
+    def _fill_span(self, y, x1, x2, color):
+        if 0 <= y < self.height:
+            x1, x2 = max(0, x1), min(self.width - 1, x2)
+            if x1 <= x2:
+                start = (y * self.width + x1) * 3
+                self.pixels[start:start + (x2 - x1 + 1) * 3] = bytearray(color) * (x2 - x1 + 1)
+
+    def rectangle(self, xy, fill, outline):
+        x1, y1, x2, y2 = (int(round(v)) for v in xy)
+        for y in range(y1, y2 + 1):
+            if y in (y1, y2):
+                self._fill_span(y, x1, x2, outline)
+            else:
+                self._fill_span(y, x1, x2, fill)
+                self._fill_span(y, x1, x1, outline)
+                self._fill_span(y, x2, x2, outline)
+
+    def line(self, xy, fill):
+        x1, y1, x2, y2 = (int(round(v)) for v in xy)
+        steps = max(abs(x2 - x1), abs(y2 - y1), 1)
+        for k in range(steps + 1):
+            x = x1 + (x2 - x1) * k // steps
+            y = y1 + (y2 - y1) * k // steps
+            self._fill_span(y, x, x, fill)
+
+    def polygon(self, points, fill):
+        ys = [y for x, y in points]
+        for y in range(int(min(ys)), int(max(ys)) + 1):
+            # Fill between the crossings of this scanline with the edges
+            crossings = []
+            for (xa, ya), (xb, yb) in zip(points, points[1:] + points[:1]):
+                if ya != yb and min(ya, yb) <= y + 0.5 < max(ya, yb):
+                    crossings.append(xa + (y + 0.5 - ya) * (xb - xa) / (yb - ya))
+            crossings.sort()
+            for xa, xb in zip(crossings[::2], crossings[1::2]):
+                self._fill_span(y, int(round(xa)), int(round(xb)), fill)
+
+    def save(self, filename):
+        row = self.width * 3
+        raw = b''.join(b'\x00' + bytes(self.pixels[y * row:(y + 1) * row])
+                       for y in range(self.height))
+
+        def chunk(kind, data):
+            return (struct.pack('>I', len(data)) + kind + data
+                    + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+        with open(filename, 'wb') as file:
+            file.write(b'\x89PNG\r\n\x1a\n')
+            file.write(chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 8, 2, 0, 0, 0)))
+            file.write(chunk(b'IDAT', zlib.compress(raw, 6)))
+            file.write(chunk(b'IEND', b''))
+
+
+def write_png(layout, filename, width=800, height=600):
+    """
+    Rasterises the chart to a PNG file, with Pillow if it is installed.
+    """
+    if Image is not None:
+        image = Image.new('RGB', (width, height), 'white')
+        draw = ImageDraw.Draw(image)
+    else:
+        image = draw = _Raster(width, height)
+
+    for item in _pixels(layout, width, height):
+        kind = item[0]
+        if kind == 'rect':
+            x1, y1, x2, y2, fill, outline = item[1:]
+            draw.rectangle((min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)),
+                           fill=_rgb(fill), outline=_rgb(outline or fill))
+        elif kind == 'line':
+            x1, y1, x2, y2, color, arrow = item[1:]
+            draw.line((x1, y1, x2, y2), fill=_rgb(color))
+            for head in _arrow_heads(x1, y1, x2, y2, arrow):
+                draw.polygon(head, fill=_rgb(color))
+        elif Image is not None:
+            x, y, text = item[1:]
+            try:
+                draw.text((x, y), text, fill=_rgb('black'), anchor='mm')
+            except ValueError:
+                # Bitmap fonts of older Pillow versions have no anchors
+                draw.text((x, y), text, fill=_rgb('black'))
+
+    image.save(filename)
+
+
+def export_schedule(schedule, num_tasks, filename, width=800, height=600, lod=True, cores=None):
+    """
+    Writes a chart of the schedule to an .svg or .png file, binning blocks
+    narrower than a pixel unless lod is turned off. With cores set, the
+    chart has one row per processor.
+    """
+    layout = ScheduleLayout(schedule, num_tasks, pixel_width=width if lod else None,
+                            cores=cores)
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.svg':
+        write_svg(layout, filename, width, height)
+    elif extension == '.png':
+        write_png(layout, filename, width, height)
+    else:
+        raise ValueError("Unsupported chart format: {}".format(extension))
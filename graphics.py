@@ -182,8 +182,18 @@ BAD_OPTION = "Illegal option value"
 ##########################################################################
 # global variables and funtions
 
-_root = tk.Tk()
-_root.withdraw()
+# The Tk root is created on first use rather than at import, so importing
+# this module needs no display until a window is opened
+_root = None
+
+def _get_root():
+    global _root
+    if _root is None:
+        _root = tk.Tk()
+        _root.withdraw()
+        # MacOS fix 1
+        _root.update()
+    return _root
 
 _update_lasttime = time.time()
 
@@ -198,7 +208,7 @@ def update(rate=None):
         else:
             _update_lasttime = now
 
-    _root.update()
+    _get_root().update()
 
 ############################################################################
 # Graphics classes start here
@@ -210,7 +220,7 @@ class GraphWin(tk.Canvas):
     def __init__(self, title="Graphics Window",
                  width=200, height=200, autoflush=True):
         assert type(title) == type(""), "Title must be a string"
-        master = tk.Toplevel(_root)
+        master = tk.Toplevel(_get_root())
         master.protocol("WM_DELETE_WINDOW", self.close)
         tk.Canvas.__init__(self, master, width=width, height=height,
                            highlightthickness=0, bd=0)
@@ -231,7 +241,7 @@ class GraphWin(tk.Canvas):
         self.closed = False
         master.lift()
         self.lastKey = ""
-        if autoflush: _root.update()
+        if autoflush: _get_root().update()
 
     def __repr__(self):
         if self.isClosed():
@@ -283,7 +293,7 @@ class GraphWin(tk.Canvas):
 
     def __autoflush(self):
         if self.autoflush:
-            _root.update()
+            _get_root().update()
 
     
     def plot(self, x, y, color="black"):
@@ -484,7 +494,7 @@ class GraphicsObject:
         self.id = self._draw(graphwin, self.config)
         graphwin.addItem(self)
         if graphwin.autoflush:
-            _root.update()
+            _get_root().update()
         return self
 
             
@@ -498,7 +508,7 @@ class GraphicsObject:
             self.canvas.delete(self.id)
             self.canvas.delItem(self)
             if self.canvas.autoflush:
-                _root.update()
+                _get_root().update()
         self.canvas = None
         self.id = None
 
@@ -520,7 +530,7 @@ class GraphicsObject:
                 y = dy
             self.canvas.move(self.id, x, y)
             if canvas.autoflush:
-                _root.update()
+                _get_root().update()
            
     def _reconfig(self, option, setting):
         # Internal method for changing configuration of the object
@@ -533,7 +543,7 @@ class GraphicsObject:
         if self.canvas and not self.canvas.isClosed():
             self.canvas.itemconfig(self.id, options)
             if self.canvas.autoflush:
-                _root.update()
+                _get_root().update()
 
 
     def _draw(self, canvas, options):
@@ -787,7 +797,7 @@ class Entry(GraphicsObject):
         self.anchor = p.clone()
         #print self.anchor
         self.width = width
-        self.text = tk.StringVar(_root)
+        self.text = tk.StringVar(_get_root())
         self.text.set("")
         self.fill = "gray"
         self.color = "black"
@@ -882,10 +892,10 @@ class Image(GraphicsObject):
         self.imageId = Image.idCount
         Image.idCount = Image.idCount + 1
         if len(pixmap) == 1: # file name provided
-            self.img = tk.PhotoImage(file=pixmap[0], master=_root)
+            self.img = tk.PhotoImage(file=pixmap[0], master=_get_root())
         else: # width and height provided
             width, height = pixmap
-            self.img = tk.PhotoImage(master=_root, width=width, height=height)
+            self.img = tk.PhotoImage(master=_get_root(), width=width, height=height)
 
     def __repr__(self):
         return "Image({}, {}, {})".format(self.anchor, self.getWidth(), self.getHeight())
@@ -1008,8 +1018,7 @@ def test():
 #MacOS fix 2
 #tk.Toplevel(_root).destroy()
 
-# MacOS fix 1
-update()
+# MacOS fix 1 is applied in _get_root() when the root is created
 
 if __name__ == "__main__":
     test()
@@ -0,0 +1,174 @@
+from __future__ import division
+
+from bisect import bisect_left, bisect_right
+from itertools import groupby
+from math import ceil
+
+
+def speed_color(speed):
+    """
+    Colour of a block run at the given speed, from green when idle to red
+    at full speed. Speeds above full speed, as Average Rate can reach, are
+    drawn red too.
+    """
+    speed = min(max(float(speed), 0), 1)
+    return "#%02x%02x%02x" % (int(255 * speed), int(255 * (1 - speed)), 0)
+
+
+class ScheduleLayout(object):
+    """
+    Geometry of a schedule chart in world coordinates, with the origin at
+    the bottom left and one row per task.
+
+    items() yields the chart as drawing primitives, one at a time:
+        ('text', x, y, text)
+        ('line', x1, y1, x2, y2, color, arrow)  arrow is None, 'first' or 'last'
+        ('rect', x1, y1, x2, y2, fill, outline)  outline is None for no outline
+    so that each backend can draw or write them without a scene graph.
+
+    Only the part of the schedule within the time window view is laid out,
+    the whole schedule by default.
+
+    With cores set to the number of processors of a multiprocessor
+    schedule, there is one row per processor instead of one per task.
+
+    With pixel_width set to the width of the output in pixels, blocks
+    narrower than a pixel are binned per row into pixel-wide buckets drawn
+    in the duration-weighted average speed colour, which bounds the number
+    of items by the width times the number of tasks.
+    """
+
+    def __init__(self, schedule, num_tasks, max_x=100, max_y=100, pixel_width=None,
+                 cores=None):
+        # Accepts a list of blocks or a columns.ScheduleTable
+        self.schedule = list(schedule)
+        self.max_x = max_x
+        self.max_y = max_y
+        self.cores = cores
+        self._get_schedule_interval()
+        self._index_rows()
+        self.margin = 4
+        self.num_tasks = num_tasks
+        self.pixel_width = pixel_width
+        self.view = (0, self.schedule_end)
+
+    def _get_schedule_interval(self):
+        self.schedule.sort(key=lambda x: x.start)
+        # Blocks on other processors can end after the last one starts
+        max_time = max(self.schedule[-1].task.b,
+                       max(sb.start + sb.duration for sb in self.schedule))
+        min_time = self.schedule[0].start
+        self.schedule_start = min_time
+        self.schedule_end = max_time
+
+    def _index_rows(self):
+        """
+        Groups the blocks into rows sorted by start. The blocks of a row
+        never overlap, so their ends are sorted too and the blocks visible
+        in any time window are found by bisection.
+        """
+        self.rows = []
+        if self.cores is not None:
+            lanes = dict((core, []) for core in range(self.cores))
+            for sb in self.schedule:
+                lanes[sb.core].append(sb)
+            for core in sorted(lanes, reverse=True):
+                blocks = lanes[core]
+                starts = [sb.start for sb in blocks]
+                ends = [sb.start + sb.duration for sb in blocks]
+                self.rows.append((core, blocks, starts, ends))
+            return
+
+        ordered = sorted(self.schedule, key=lambda x: x.task.name, reverse=True)
+        for name, blocks in groupby(ordered, key=lambda x: x.task.name):
+            blocks = list(blocks)
+            starts = [sb.start for sb in blocks]
+            ends = [sb.start + sb.duration for sb in blocks]
+            self.rows.append((blocks[0].task, blocks, starts, ends))
+
+    def visible_blocks(self, row, t0, t1):
+        """
+        Returns the blocks of a row that overlap the time window [t0, t1].
+        """
+        key, blocks, starts, ends = row
+        return blocks[bisect_left(ends, t0):bisect_right(starts, t1)]
+
+    def items(self):
+        t0, t1 = self.view
+        interval = (self.max_x - 2*self.margin) / (t1 - t0)
+        spacing = self.max_x / (self.num_tasks if self.cores is None else self.cores)
+        height = spacing / self.margin
+
+        step = max(1, int((t1 - t0) / 5))
+
+        for z in range(int(ceil(t0 / step)) * step, int(ceil(t1)) + 1, step):
+            yield ('text', ((z - t0) * interval) + self.margin, self.margin-1.5, str(z))
+
+        for i, row in enumerate(self.rows):
+            y = i * spacing + self.margin
+            if self.cores is None:
+                row_items = self._task_items(row[0], interval, y, height)
+            else:
+                row_items = self._lane_items(row[0], y, height)
+            for item in row_items:
+                yield item
+            for item in self._block_items(self.visible_blocks(row, t0, t1), interval, y, height):
+                yield item
+
+        yield ('line', self.margin, self.margin, self.max_x - self.margin, self.margin, 'black', None)
+        yield ('line', self.margin, self.margin, self.margin, self.max_y - self.margin, 'black', None)
+
+    def _block_items(self, blocks, interval, y, height):
+        """
+        Yields the rectangles of the blocks of one row.
+        """
+        if self.pixel_width is None:
+            pixel = 0
+        else:
+            pixel = self.max_x / self.pixel_width
+
+        t0, t1 = self.view
+        bucket = None
+        for sb in blocks:
+            x1 = self.margin + ((max(sb.start, t0) - t0) * interval)
+            x2 = self.margin + ((min(sb.start + sb.duration, t1) - t0) * interval)
+            if x2 - x1 >= pixel:
+                yield ('rect', x1, y, x2, y + height, speed_color(sb.execution_speed), 'black')
+                continue
+
+            k = int(x1 // pixel)
+            if bucket != k:
+                if bucket is not None:
+                    yield self._bucket_item(bucket, pixel, work, duration, y, height)
+                bucket, work, duration = k, 0, 0
+            work += sb.execution_speed * sb.duration
+            duration += sb.duration
+
+        if bucket is not None:
+            yield self._bucket_item(bucket, pixel, work, duration, y, height)
+
+    def _bucket_item(self, k, pixel, work, duration, y, height):
+        speed = work / duration if duration else 0
+        return ('rect', k * pixel, y, (k + 1) * pixel, y + height, speed_color(speed), None)
+
+    def _task_items(self, task, interval, y, height):
+        """
+        Yields the label, release and deadline arrows and row line of a task.
+        """
+        t0, t1 = self.view
+        deadline = ((task.b - t0) * interval) + self.margin
+        release = ((task.a - t0) * interval) + self.margin
+
+        if t0 <= task.a <= t1:
+            yield ('line', release, y, release, y + height, 'green', 'last')
+        if t0 <= task.b <= t1:
+            yield ('line', deadline, y, deadline, y + height, 'black', 'first')
+        yield ('text', self.margin-2, y - self.margin + height + 4, task.name)
+        yield ('line', self.margin, y, self.max_x - 1, y, 'black', None)
+
+    def _lane_items(self, core, y, height):
+        """
+        Yields the label and row line of a processor.
+        """
+        yield ('text', self.margin-2, y - self.margin + height + 4, "P{}".format(core))
+        yield ('line', self.margin, y, self.max_x - 1, y, 'black', None)
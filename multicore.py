@@ -0,0 +1,276 @@
+"""
+Energy-minimal scheduling on m identical processors with migration.
+
+The times at which tasks are released or due cut the time line into
+elementary intervals. A set S of tasks can at most use, in interval j of
+length l_j where m_j processors are still free,
+
+    min(m_j, number of tasks of S active in j) * l_j
+
+processor time, since a task runs on one processor at a time. The critical
+set is the set with the highest ratio of work to that capacity. Its ratio
+is the lowest speed at which all remaining tasks fit, found with
+Dinkelbach's method: for a speed s, a maximum flow from the source through
+the tasks (capacity r) and intervals (capacity s * l_j from each active
+task) to the sink (capacity s * m_j * l_j) has a minimum cut whose source
+side is the set maximising work - s * capacity.
+
+Once the critical set runs at its speed it fills whole processors in every
+interval, so they are taken out of m_j and the remaining tasks are solved
+on what is left. The time each task gets in each interval is read off the
+flow and packed onto processors with McNaughton's wrap-around rule.
+"""
+from __future__ import division
+
+from bisect import bisect_left
+from collections import deque
+from fractions import Fraction
+from multiprocessing import Pool
+
+from scheduler import (SchedulingBlock, SchedulingError, ScheduleResult,
+                       coalesce_blocks)
+
+
+class _FlowNetwork(object):
+    """
+    Integer maximum flow with Dinic's algorithm.
+    """
+
+    def __init__(self, size):
+        self.edges = [[] for _ in range(size)]
+        # Edge i goes to head[i] with residual capacity cap[i]; edge i ^ 1
+        # is its reverse
+        self.head = []
+        self.cap = []
+
+    def add_edge(self, u, v, capacity):
+        self.edges[u].append(len(self.head))
+        self.head.append(v)
+        self.cap.append(capacity)
+        self.edges[v].append(len(self.head))
+        self.head.append(u)
+        self.cap.append(0)
+        return len(self.head) - 2
+
+    def _levels(self, source):
+        level = [-1] * len(self.edges)
+        level[source] = 0
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for e in self.edges[u]:
+                if self.cap[e] > 0 and level[self.head[e]] < 0:
+                    level[self.head[e]] = level[u] + 1
+                    queue.append(self.head[e])
+        return level
+
+    def _augment(self, u, sink, limit, level, next_edge):
+        if u == sink:
+            return limit
+        edges = self.edges[u]
+        while next_edge[u] < len(edges):
+            e = edges[next_edge[u]]
+            v = self.head[e]
+            if self.cap[e] > 0 and level[v] == level[u] + 1:
+                pushed = self._augment(v, sink, min(limit, self.cap[e]), level, next_edge)
+                if pushed:
+                    self.cap[e] -= pushed
+                    self.cap[e ^ 1] += pushed
+                    return pushed
+            next_edge[u] += 1
+        return 0
+
+    def max_flow(self, source, sink):
+        flow = 0
+        while True:
+            level = self._levels(source)
+            if level[sink] < 0:
+                return flow
+            next_edge = [0] * len(self.edges)
+            pushed = self._augment(source, sink, float('inf'), level, next_edge)
+            while pushed:
+                flow += pushed
+                pushed = self._augment(source, sink, float('inf'), level, next_edge)
+
+    def source_side(self, source):
+        """
+        Returns the nodes reachable from source in the residual network.
+        """
+        return [u for u, level in enumerate(self._levels(source)) if level >= 0]
+
+    def flow(self, e):
+        return self.cap[e ^ 1]
+
+
+class _Component(object):
+    """
+    Tasks whose intervals overlap, cut into elementary intervals, with the
+    number of processors still free in each.
+    """
+
+    def __init__(self, tasks, cores):
+        self.tasks = tasks
+        self.times = sorted(set([t.a for t in tasks] + [t.b for t in tasks]))
+        self.lengths = [t1 - t0 for t0, t1 in zip(self.times, self.times[1:])]
+        self.free = [cores] * len(self.lengths)
+        self.used = [0] * len(self.lengths)
+        self.spans = dict((i, range(bisect_left(self.times, t.a), bisect_left(self.times, t.b)))
+                          for i, t in enumerate(tasks))
+
+    def work(self, group):
+        return sum(self.tasks[i].r for i in group)
+
+    def capacity(self, group):
+        active = [0] * len(self.lengths)
+        for i in group:
+            for j in self.spans[i]:
+                active[j] += 1
+        return sum(min(free, n) * length
+                   for free, n, length in zip(self.free, active, self.lengths))
+
+    def network(self, group, speed):
+        """
+        Builds the flow network of group at speed, scaled to integers.
+        Returns the network and the job to interval edges.
+        """
+        p, q = speed.numerator, speed.denominator
+        sink = len(group) + len(self.lengths) + 1
+        network = _FlowNetwork(sink + 1)
+        edges = {}
+        for k, i in enumerate(group):
+            network.add_edge(0, k + 1, self.tasks[i].r * q)
+            for j in self.spans[i]:
+                if self.free[j]:
+                    edges[i, j] = network.add_edge(k + 1, len(group) + j + 1, self.lengths[j] * p)
+        for j, length in enumerate(self.lengths):
+            if self.free[j]:
+                network.add_edge(len(group) + j + 1, sink, self.free[j] * length * p)
+        return network, edges
+
+    def critical_set(self, group):
+        """
+        Returns the speed and critical set of the tasks in group.
+        """
+        capacity = self.capacity(group)
+        if not capacity:
+            raise SchedulingError(float('inf'), set(self.tasks[i] for i in group))
+        speed = Fraction(self.work(group), capacity)
+        critical = group
+        while True:
+            network, edges = self.network(group, speed)
+            network.max_flow(0, len(group) + len(self.lengths) + 1)
+            denser = [group[k - 1] for k in network.source_side(0) if 0 < k <= len(group)]
+            if not denser:
+                return speed, critical
+            capacity = self.capacity(denser)
+            if not capacity:
+                raise SchedulingError(float('inf'), set(self.tasks[i] for i in denser))
+            ratio = Fraction(self.work(denser), capacity)
+            if ratio <= speed:
+                return speed, critical
+            speed, critical = ratio, denser
+
+    def pack(self, critical, speed):
+        """
+        Places the critical set on the free processors, returning its
+        blocks as (task index, start, duration, speed, core), and takes the
+        processors it fills out of the free ones.
+        """
+        network, edges = self.network(critical, speed)
+        network.max_flow(0, len(critical) + len(self.lengths) + 1)
+
+        blocks = []
+        for j, length in enumerate(self.lengths):
+            core = self.used[j]
+            start = self.times[j]
+            filled = 0
+            for i in sorted((i for i in critical if (i, j) in edges), key=lambda i: self.tasks[i].b):
+                run = Fraction(network.flow(edges[i, j]), speed.numerator)
+                while run > 0:
+                    part = min(run, length - filled)
+                    blocks.append((i, start + filled, part, speed, core))
+                    filled += part
+                    run -= part
+                    if filled == length:
+                        core += 1
+                        filled = 0
+            taken = core - self.used[j] + (1 if filled else 0)
+            self.used[j] += taken
+            self.free[j] -= taken
+        return blocks
+
+
+def _components(tasks):
+    """
+    Splits tasks into groups whose intervals do not overlap other groups,
+    each of which can be scheduled on its own.
+    """
+    components = []
+    end = None
+    for task in sorted(tasks, key=lambda x: x.a):
+        if end is None or task.a >= end:
+            components.append([])
+            end = task.b
+        components[-1].append(task)
+        end = max(end, task.b)
+    return components
+
+
+def _schedule_component(job):
+    """
+    Schedules one component, returning its rounds as (speed, task indices)
+    and its blocks as (task index, start, duration, speed, core).
+    """
+    tasks, cores = job
+    component = _Component(tasks, cores)
+    remaining = [i for i, t in enumerate(tasks) if t.r > 0]
+    rounds = []
+    blocks = []
+
+    while remaining:
+        speed, critical = component.critical_set(remaining)
+        if speed > 1:
+            raise SchedulingError(speed, set(tasks[i] for i in critical))
+        blocks += component.pack(critical, speed)
+        rounds.append((speed, critical))
+        critical = set(critical)
+        remaining = [i for i in remaining if i not in critical]
+    return rounds, blocks
+
+
+def schedule_multicore(tasks, cores, processes=1):
+    """
+    Schedules tasks on the given number of identical processors, letting
+    tasks migrate between them, with the least energy.
+
+    Tasks are not modified. The blocks of the returned ScheduleResult carry
+    the processor they run on in core, and its groups list the speed and
+    critical set of each round. Groups of tasks that never overlap in time
+    are independent and solved in a pool of the given number of processes,
+    all cores if None. Raises SchedulingError if a critical set needs a
+    speed above 1, and ValueError if cores is less than 1.
+    """
+    if cores < 1:
+        raise ValueError("Need at least one core, got {}".format(cores))
+    components = _components(tasks)
+    jobs = [(component, cores) for component in components]
+    if processes == 1 or len(jobs) < 2:
+        solved = [_schedule_component(job) for job in jobs]
+    else:
+        pool = Pool(processes)
+        try:
+            solved = pool.map(_schedule_component, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+    result = ScheduleResult()
+    for component, (rounds, blocks) in zip(components, solved):
+        # Workers return indices so that blocks refer to the given tasks
+        for speed, critical in rounds:
+            result.groups.append((speed, frozenset(component[i] for i in critical)))
+        blocks = [SchedulingBlock(component[i], start, duration, speed, core)
+                  for i, start, duration, speed, core in blocks]
+        blocks.sort(key=lambda x: (x.core, x.start))
+        result.blocks += coalesce_blocks(blocks)
+    return result
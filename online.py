@@ -0,0 +1,185 @@
+"""
+Online scheduling of tasks that arrive over time.
+
+The tasks are read one at a time from any iterable in order of release,
+and blocks are yielded as soon as they are finished, without knowing the
+tasks that arrive later. Two policies are available:
+
+    average_rate       runs at the sum of the densities r / (b - a) of the
+                       tasks whose interval contains the current time
+    optimal_available  runs the optimal schedule of the remaining work,
+                       recomputed at every arrival
+
+Both execute the pending work in EDF order and use exact fractions.
+"""
+from __future__ import division
+
+from bisect import insort
+from fractions import Fraction
+from heapq import heappop, heappush
+
+from scheduler import SchedulingBlock
+
+
+class _OnlineScheduler(object):
+    """
+    Pending work in EDF order and the clock, shared by the policies. Each
+    policy defines run(until), which yields the blocks run from now until
+    the given time, or until all pending work is done if until is None.
+    """
+
+    def __init__(self):
+        # Entries [-b, -order, task, remaining work], sorted so that the
+        # earliest deadline, and the earliest release among equal ones, is
+        # last and can be popped in O(1)
+        self.pending = []
+        self.order = 0
+        self.now = None
+
+    def arrive(self, task):
+        if self.now is not None and task.a < self.now:
+            raise ValueError("Task {} arrived at {} after time {}".format(task.name, task.a, self.now))
+        if task.b <= task.a:
+            raise ValueError("Task {} has an empty interval".format(task.name))
+        self.now = task.a
+        if task.r > 0:
+            insort(self.pending, [-task.b, -self.order, task, Fraction(task.r)])
+        self.order += 1
+
+    def execute(self, end, speed):
+        """
+        Runs the pending work in EDF order at speed until end or until no
+        work is left, yielding the blocks run.
+        """
+        while self.pending and self.now < end and speed > 0:
+            entry = self.pending[-1]
+            run = min(entry[3] / speed, end - self.now)
+            yield SchedulingBlock(entry[2], self.now, run, speed)
+            entry[3] -= run * speed
+            self.now += run
+            if entry[3] <= 0:
+                self.pending.pop()
+        if self.now < end:
+            self.now = end
+
+
+class AverageRate(_OnlineScheduler):
+    """
+    Average Rate: the speed at any time is the sum of the densities of the
+    tasks whose interval contains it.
+    """
+
+    def __init__(self):
+        _OnlineScheduler.__init__(self)
+        self.density = 0
+        # Deadlines at which the density of an arrived task stops counting
+        self.expiries = []
+
+    def arrive(self, task):
+        _OnlineScheduler.arrive(self, task)
+        density = Fraction(task.r, task.b - task.a)
+        self.density += density
+        heappush(self.expiries, (task.b, self.order, density))
+
+    def run(self, until):
+        while self.expiries and (until is None or self.expiries[0][0] < until):
+            b = self.expiries[0][0]
+            for sb in self.execute(b, self.density):
+                yield sb
+            while self.expiries and self.expiries[0][0] == b:
+                self.density -= heappop(self.expiries)[2]
+        if until is not None:
+            for sb in self.execute(until, self.density):
+                yield sb
+
+
+class OptimalAvailable(_OnlineScheduler):
+    """
+    Optimal Available: at every arrival, the remaining work is scheduled
+    optimally as if nothing else were going to arrive.
+
+    All remaining work is available now, so the optimal schedule is a
+    staircase of decreasing speeds, the upper concave hull of the work due
+    by each deadline. It is computed in one pass over the pending work,
+    which is kept sorted by deadline as tasks arrive.
+    """
+
+    def staircase(self):
+        """
+        Returns the steps of the optimal schedule of the remaining work as
+        a list of (end, speed).
+        """
+        hull = [(self.now, 0)]
+        work = 0
+        for entry in reversed(self.pending):
+            b = -entry[0]
+            work += entry[3]
+            if hull[-1][0] == b:
+                hull.pop()
+            # Drop points on or below the line from the previous one to here
+            while len(hull) > 1:
+                (x0, y0), (x1, y1) = hull[-2], hull[-1]
+                if (x1 - x0) * (work - y0) - (y1 - y0) * (b - x0) < 0:
+                    break
+                hull.pop()
+            hull.append((b, work))
+
+        return [(x1, (y1 - y0) / (x1 - x0))
+                for (x0, y0), (x1, y1) in zip(hull, hull[1:])]
+
+    def run(self, until):
+        for end, speed in self.staircase():
+            if until is not None and end >= until:
+                break
+            for sb in self.execute(end, speed):
+                yield sb
+        else:
+            return
+        for sb in self.execute(until, speed):
+            yield sb
+
+
+def _merge(blocks):
+    """
+    Joins blocks of the same task and speed that follow each other.
+    """
+    last = None
+    for sb in blocks:
+        if (last and last.task is sb.task and last.execution_speed == sb.execution_speed
+                and last.start + last.duration == sb.start):
+            last.duration += sb.duration
+            continue
+        if last:
+            yield last
+        last = sb
+    if last:
+        yield last
+
+
+def _online(arrivals, scheduler):
+    for task in arrivals:
+        if scheduler.now is not None:
+            for sb in scheduler.run(task.a):
+                yield sb
+        scheduler.arrive(task)
+    for sb in scheduler.run(None):
+        yield sb
+
+
+def average_rate(arrivals):
+    """
+    Schedules the tasks of arrivals, an iterable in order of release, with
+    the Average Rate policy, yielding each block once it is finished.
+    """
+    return _merge(_online(arrivals, AverageRate()))
+
+
+def optimal_available(arrivals):
+    """
+    Schedules the tasks of arrivals, an iterable in order of release, with
+    the Optimal Available policy, yielding each block once it is finished.
+    """
+    return _merge(_online(arrivals, OptimalAvailable()))
+
+
+POLICIES = {'avr': average_rate, 'oa': optimal_available}
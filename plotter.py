@@ -0,0 +1,58 @@
+from graphics import *
+from layout import ScheduleLayout
+
+
+def plot_tasks(tasks):
+    schedule = []
+    elapsed = 0
+
+    for task in tasks:
+        if task.a > elapsed:
+            schedule.append((task, task.a, task.r, 1))
+            elapsed += (task.a - elapsed)
+        else:
+            schedule.append((task, elapsed, task.r, 1))
+            elapsed += task.r + task.a
+
+    plotter = SchedulePlotter(schedule)
+    plotter.draw_schedule()
+
+
+class SchedulePlotter(ScheduleLayout):
+    def __init__(self, schedule, num_tasks, max_x=100, max_y=100, lod=True, cores=None):
+        width = 800
+        ScheduleLayout.__init__(self, schedule, num_tasks, max_x, max_y,
+                                pixel_width=width if lod else None, cores=cores)
+        self.window = GraphWin(width=width, height=600, autoflush=False)
+        self.window.setCoords(0, 0, self.max_x, self.max_y)
+
+    def draw_schedule(self):
+        """
+        Draws the schedule in a single batch: the window is only flushed
+        once everything is drawn, and the label, release and deadline
+        arrows and row line of each task are drawn once per task rather
+        than once per block.
+        """
+        for item in self.items():
+            self._draw_item(item)
+        self.window.flush()
+        self.window.getMouse()
+
+    def _draw_item(self, item):
+        kind = item[0]
+        if kind == 'rect':
+            x1, y1, x2, y2, fill, outline = item[1:]
+            shape = Rectangle(Point(x1, y1), Point(x2, y2))
+            shape.setFill(fill)
+            shape.setOutline(outline or fill)
+        elif kind == 'line':
+            x1, y1, x2, y2, color, arrow = item[1:]
+            shape = Line(Point(x1, y1), Point(x2, y2))
+            shape.setFill(color)
+            if arrow:
+                shape.setArrow(arrow)
+        else:
+            x, y, text = item[1:]
+            shape = Text(Point(x, y), text)
+        shape.draw(self.window)
+        return shape
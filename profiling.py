@@ -0,0 +1,135 @@
+"""
+Per-round instrumentation of the scheduling rounds.
+
+Inside a profiling() block every round run by scheduler.schedule_rounds,
+and so by schedule() and solve(), is recorded: the wall time of the
+critical group search, EDF, coalescing and revision stages, the number of
+candidate intervals evaluated by the engines of critical.py, the size of
+the critical group, the EDF events (task releases and dispatched blocks)
+and, if requested, the memory allocated. Outside of it the scheduler only
+checks that no profile is set once per stage.
+
+    with profiling() as profile:
+        schedule(tasks)
+    profile.write_json("profile.json")
+    profile.write_folded("profile.folded")
+
+The folded output has one "frame;frame count" line per stack, as read by
+flamegraph.pl and speedscope, with the counts in microseconds.
+"""
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import critical
+import scheduler
+
+STAGES = ['critical_group', 'edf', 'coalesce', 'revision']
+
+
+class Profile(object):
+    """
+    Records of the rounds run while the profile is active, one dict per
+    round.
+    """
+
+    def __init__(self, allocations=False):
+        self.allocations = allocations
+        self.rounds = []
+        self.counters = {'candidates': 0}
+        self._round = None
+        self._last = None
+        self._memory = None
+
+    def start_round(self, num_tasks):
+        self.counters['candidates'] = 0
+        self._round = {'tasks': num_tasks, 'seconds': dict((stage, 0) for stage in STAGES)}
+        if self.allocations and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._memory = tracemalloc.get_traced_memory()[0]
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self._round['seconds'][stage] += now - self._last
+        self._last = now
+
+    def resume(self):
+        """
+        Restarts the clock, leaving out the time spent by the caller.
+        """
+        self._last = time.perf_counter()
+
+    def end_round(self, g, critical_group, blocks):
+        record = self._round
+        record['speed'] = float(g)
+        record['group_size'] = len(critical_group)
+        record['candidates'] = self.counters['candidates']
+        record['edf_events'] = len(critical_group) + len(blocks) if blocks else 0
+        if self._memory is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            record['allocated_bytes'] = current - self._memory
+            record['peak_bytes'] = peak - self._memory
+            self._memory = None
+        self.rounds.append(record)
+        self._round = None
+
+    def totals(self):
+        """
+        Returns the seconds spent in each stage over all rounds.
+        """
+        return dict((stage, sum(record['seconds'][stage] for record in self.rounds))
+                    for stage in STAGES)
+
+    def to_dict(self):
+        return {'rounds': self.rounds, 'totals': self.totals(),
+                'candidates': sum(record['candidates'] for record in self.rounds),
+                'edf_events': sum(record['edf_events'] for record in self.rounds)}
+
+    def write_json(self, filename):
+        with open(filename, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def folded(self, per_round=False):
+        """
+        Yields the folded stacks of the stages, with one frame per round
+        below schedule if per_round is set.
+        """
+        if per_round:
+            for i, record in enumerate(self.rounds):
+                for stage in STAGES:
+                    micros = int(record['seconds'][stage] * 1e6)
+                    if micros:
+                        yield "schedule;round {};{} {}".format(i + 1, stage, micros)
+        else:
+            for stage, seconds in sorted(self.totals().items()):
+                if int(seconds * 1e6):
+                    yield "schedule;{} {}".format(stage, int(seconds * 1e6))
+
+    def write_folded(self, filename, per_round=False):
+        with open(filename, 'w') as file:
+            for line in self.folded(per_round):
+                file.write(line + "\n")
+
+
+@contextmanager
+def profiling(allocations=False):
+    """
+    Records the scheduling rounds run inside the block in the Profile it
+    yields. With allocations set, memory is traced with tracemalloc, which
+    slows the rounds down.
+    """
+    profile = Profile(allocations)
+    previous = scheduler._profile, critical.counters
+    tracing = allocations and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    scheduler._profile = profile
+    critical.counters = profile.counters
+    try:
+        yield profile
+    finally:
+        scheduler._profile, critical.counters = previous
+        if tracing:
+            tracemalloc.stop()
@@ -1,10 +1,19 @@
 from __future__ import division
 
 import re
+from fractions import Fraction
+from heapq import heappop, heappush
 from math import floor
 
+from critical import find_critical_group_sweep
+
+# Profile recorded by schedule_rounds, set by profiling.profiling()
+_profile = None
+
+
+class Task(object):
+    __slots__ = ('name', 'a', 'b', 'r')
 
-class Task:
     def __init__(self, name, a, b, r):
         self.name = name
         self.a = int(a)
@@ -24,30 +33,92 @@ class Task:
                                           self.r)
 
 
-class SchedulingBlock:
-    def __init__(self, task, start, duration, execution_speed):
+class SchedulingBlock(object):
+    __slots__ = ('task', 'start', 'duration', 'execution_speed', 'core')
+
+    def __init__(self, task, start, duration, execution_speed, core=0):
         self.task = task
         self.start = start
         self.duration = duration
         self.execution_speed = execution_speed
+        # Processor the block runs on, always 0 on a single processor
+        self.core = core
+
+
+TASK_LINE = re.compile(r'^[ \t]*(\S+?)[ \t]*\([ \t]*(\d+)[ \t]*,[ \t]*(\d+)[ \t]*,[ \t]*(\d+)[ \t]*\)',
+                       re.MULTILINE)
+
+
+def read_header(file):
+    """
+    Reads the task count from the first line of an open task file, raising
+    ValueError if it is not a number.
+    """
+    line = file.readline()
+    try:
+        return int(line.strip())
+    except ValueError:
+        raise ValueError("Parse Error: line 1: expected the task count, found {!r}".format(
+            line.strip()))
+
+
+def parse_task_lines(file, num_tasks, chunk_size=1 << 20):
+    """
+    Lazily parses the task lines of an open task file, yielding the name,
+    a, b and r of each task. Raises ValueError naming the first line that
+    is not a task, or at the end if the count does not match the header.
+
+    The file is read in chunks of whole lines that are matched in one go;
+    a chunk with a line that does not match is parsed again line by line
+    to find it.
+    """
+    count = 0
+    # The header is line 1
+    line_number = 1
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        if not chunk.endswith("\n"):
+            chunk += file.readline()
+
+        tasks = TASK_LINE.findall(chunk)
+        if len(tasks) != chunk.count("\n") + (not chunk.endswith("\n")):
+            tasks = []
+            for offset, line in enumerate(chunk.splitlines()):
+                m = TASK_LINE.match(line)
+                if m:
+                    tasks.append(m.groups())
+                elif line.strip():
+                    raise ValueError("Parse Error: line {}: {}".format(line_number + offset + 1,
+                                                                       line.strip()))
+        line_number += chunk.count("\n")
+
+        count += len(tasks)
+        for name, a, b, r in tasks:
+            yield name, int(a), int(b), int(r)
+
+    if count != num_tasks:
+        raise ValueError("Parse Error: expected {} tasks, found {}".format(num_tasks, count))
+
+
+def iter_tasks(filename):
+    """
+    Yields the tasks of the given file one at a time.
+    """
+    with open(filename, "r") as file:
+        num_tasks = read_header(file)
+        for name, a, b, r in parse_task_lines(file, num_tasks):
+            yield Task(name, a, b, r)
 
 
 def load_tasks(filename):
     """
     Loads tasks from the given file.
     """
-    tasks = []
-    file = open(filename, "r")
-    lines = file.readlines()
-    num_tasks = int(lines[0].strip())
-
-    for line in lines[1:]:
-        if re.match('.*\s*\(\d*,\s*\d*,\s\d*\)', line):
-            name, a, b, r = (line.replace("(", " ").replace(")", " ").replace(",", " ")).split()
-            task = Task(name, a, b, r)
-            tasks.append(task)
-        else:
-            print("Parse Error: {}".format(line))
+    with open(filename, "r") as file:
+        num_tasks = read_header(file)
+        tasks = [Task(name, a, b, r) for name, a, b, r in parse_task_lines(file, num_tasks)]
     return tasks, num_tasks
 
 
@@ -67,32 +138,50 @@ def tasks_in_interval(a, b, tasks):
     return in_interval
 
 
-# O(n^2) algorithm for finding critical group
+# O(n^3) reference algorithm for finding critical group, see
+# critical.find_critical_group_sweep for the engine used by schedule()
 def find_critical_group(task_set):
     """
     Finds the critical group for a given task set.
-    """
-    isets = []
 
+    Only the bounds of the best interval so far are kept while scanning,
+    and its tasks are collected once at the end.
+    """
     a_vals = [ti.a for ti in task_set]
     b_vals = [ti.b for ti in task_set]
 
-    max_idx = 0
     max_g = 0
-    i = 0
+    best = None
+    # The first non-empty interval is the group if none has g <= 1
+    first = None
 
     for a in a_vals:
         for b in filter(lambda x: x > a, b_vals):
-            iset = tasks_in_interval(a, b, task_set)
-            if iset:
-                iset_interval = b - a
-                g_val = sum(task.r for task in iset) / iset_interval
+            work = 0
+            count = 0
+            for task in task_set:
+                if task.a >= a and task.b <= b:
+                    work += task.r
+                    count += 1
+            if count:
+                g_val = work / (b - a)
                 if max_g <= g_val <= 1:
                     max_g = g_val
-                    max_idx = i
-                i += 1
-                isets.append(iset)
-    return max_g, set(isets[max_idx])
+                    best = (a, b)
+                if first is None:
+                    first = (a, b)
+
+    a, b = best if best is not None else first
+    return max_g, tasks_in_interval(a, b, task_set)
+
+
+def check_critical_group(task_set, finder=find_critical_group_sweep):
+    """
+    Checks a critical group engine against find_critical_group.
+    """
+    expected_g, expected_group = find_critical_group(task_set)
+    g, group = finder(task_set)
+    return g == expected_g and group == expected_group
 
 
 def get_ready_at_time(task_set, t):
@@ -123,49 +212,227 @@ def edf(task_set, g):
         task.r = floor(task.r)
 
     elapsed = 0
+    # Ready tasks are added in order of release as they arrive, instead of
+    # filtering the whole set every tick
+    pending = sorted(task_set, key=lambda x: x.a)
+    i = 0
+    ready_tasks = set()
 
     while task_set:
-        ready_tasks = get_ready_at_time(task_set, elapsed)
-
+        while i < len(pending) and pending[i].a <= elapsed:
+            ready_tasks.add(pending[i])
+            i += 1
         if ready_tasks:
             scheduled_task = get_earliest_deadline(ready_tasks)
             scheduled_task.r -= 1
             if scheduled_task.r == 0:
                 task_set -= {scheduled_task}
+                ready_tasks -= {scheduled_task}
             f_schedule.append(SchedulingBlock(scheduled_task, elapsed, 1, g))
         elapsed += 1
 
     return f_schedule
 
 
-def schedule(initial_task_set):
+def _edf_blocks(task_set, run_time, speed):
     """
-    Main scheduling algorithm.
+    EDF schedule the given task set, giving each task run_time(task) time
+    units at speed and jumping from one release or completion to the next.
+    Yields one block per stretch between such events.
     """
-    f_schedule = []
+    pending = sorted(task_set, key=lambda x: x.a)
+    remaining = {}
+    ready = []
+    i = 0
+    elapsed = 0
 
-    task_set = set(initial_task_set)
+    while i < len(pending) or ready:
+        if not ready:
+            elapsed = max(elapsed, pending[i].a)
+
+        # Release everything that has arrived, ordered by deadline
+        while i < len(pending) and pending[i].a <= elapsed:
+            task = pending[i]
+            remaining[task] = run_time(task)
+            heappush(ready, (task.b, i, task))
+            i += 1
+
+        b, order, scheduled_task = ready[0]
+        run = remaining[scheduled_task]
+        if i < len(pending):
+            run = min(run, pending[i].a - elapsed)
+
+        if run > 0:
+            yield SchedulingBlock(scheduled_task, elapsed, run, speed)
+            remaining[scheduled_task] -= run
+            elapsed += run
+        if remaining[scheduled_task] <= 0:
+            heappop(ready)
+
+
+def edf_events(task_set, g):
+    """
+    EDF schedule the given task set, jumping from one release or completion
+    to the next instead of ticking through every time unit.
+
+    Gives each task the same run time as edf(), with one block per
+    continuous run of a task, and leaves the tasks untouched. The
+    schedules are the same when deadlines are distinct. Among tasks with
+    equal deadlines edf() picks whichever its set yields first, while this
+    runs the earliest released one, so the order of such tasks can
+    differ.
+    """
+    return coalesce_blocks(_edf_blocks(task_set, lambda task: floor(task.r / g), g))
+
+
+def exact_speed(task_set, g):
+    """
+    Returns the speed g of a critical group as an exact fraction.
+    """
+    a, b = task_set_interval(task_set)
+    speed = Fraction(sum(task.r for task in task_set), b - a)
+    # The group spans its critical interval unless the engine fell back
+    return speed if float(speed) == g else Fraction(g)
+
+
+def check_work(f_schedule, task_set, tolerance=0):
+    """
+    Checks that the blocks of each task add up to its original run time
+    at their execution speed.
+    """
+    work = dict((task, 0) for task in task_set)
+    for sb in f_schedule:
+        work[sb.task] += sb.duration * sb.execution_speed
+    return all(abs(work[task] - task.r) <= tolerance for task in task_set)
+
+
+def edf_continuous(task_set, g, exact=True):
+    """
+    EDF schedule the given task set in continuous time.
+
+    Run times are not rounded to whole time units: each task runs for
+    exactly r / g, kept as a Fraction when exact is set or as a float
+    otherwise, and blocks start and end at fractional times.
+    """
+    speed = exact_speed(task_set, g) if exact else g
+    f_schedule = coalesce_blocks(_edf_blocks(task_set, lambda task: task.r / speed, speed))
+
+    # A float speed leaves rounding errors in the work that grow with the
+    # times. The check raises rather than asserts so that it also runs
+    # under python -O.
+    end = max([sb.start + sb.duration for sb in f_schedule] or [0])
+    if not check_work(f_schedule, task_set, 0 if exact else 1e-9 * max(1, end)):
+        raise ValueError("Work done at speed {} does not match the run times".format(speed))
+    return f_schedule
+
+
+def coalesce_blocks(f_schedule):
+    """
+    Merges consecutive blocks of the same task and speed that follow each
+    other without a gap into a single longer block.
+    """
+    coalesced = []
+    # Merged block owned by this function, the input blocks are not modified
+    merged = None
+    for sb in f_schedule:
+        last = coalesced[-1] if coalesced else None
+        if (last and last.task is sb.task and last.execution_speed == sb.execution_speed
+                and last.core == sb.core and last.start + last.duration == sb.start):
+            if last is not merged:
+                merged = SchedulingBlock(last.task, last.start, last.duration,
+                                         last.execution_speed, last.core)
+                coalesced[-1] = merged
+            merged.duration += sb.duration
+        else:
+            coalesced.append(sb)
+    return coalesced
+
+
+class SchedulingError(Exception):
+    """
+    Raised when a critical group cannot be scheduled at any speed.
+    """
+
+    def __init__(self, g, critical_group):
+        Exception.__init__(self, "Task(s) {} is/are unschedulable".format(critical_group))
+        self.g = g
+        self.critical_group = critical_group
+
+
+class ScheduleResult(object):
+    """
+    Outcome of schedule() and solve(): the scheduling blocks, the speed and
+    critical group of each round, and the groups that could not be
+    scheduled at any speed with the speed they would have needed.
+
+    Iterating over a result yields its blocks, so it can be used wherever
+    a list of blocks is expected.
+    """
+
+    def __init__(self):
+        self.blocks = []
+        self.groups = []
+        self.infeasible = []
 
+    @property
+    def speeds(self):
+        return [g for g, group in self.groups]
+
+    @property
+    def feasible(self):
+        return not self.infeasible
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+    def __len__(self):
+        return len(self.blocks)
+
+
+def schedule_rounds(task_set, finder=find_critical_group_sweep, executor=edf_events,
+                    skip_infeasible=False):
+    """
+    Runs the scheduling rounds on task_set, yielding the speed, critical
+    group and blocks of each round. task_set and its tasks are modified.
+
+    An unschedulable group raises SchedulingError, unless skip_infeasible
+    is set, in which case it is yielded with None for its blocks and the
+    remaining tasks are revised as if it had been scheduled.
+    """
+    profile = _profile
     # While the original task set still has members
     while task_set:
+        if profile is not None:
+            profile.start_round(len(task_set))
+
         # Find the critical group of tasks
-        g, critical_group = find_critical_group(task_set)
+        g, critical_group = finder(task_set)
         a, b = task_set_interval(critical_group)
-        print("#" * 20)
-        print("Critical Group {} \t{}\n".format(g, critical_group))
-        # total += sum(task.r/g for task in critical_group)
+        if profile is not None:
+            profile.lap('critical_group')
 
-        if not is_schedulable(critical_group):
-            print("Error: Task(s) {} is/are unschedulable".format(critical_group))
-            exit()
+        schedulable = is_schedulable(critical_group)
+        if not schedulable and not skip_infeasible:
+            raise SchedulingError(g, critical_group)
 
         # Remove the critical group from the original set
         task_set -= critical_group
 
         # Schedule the tasks in the critical group
-        sched = edf(critical_group, g)
-        f_schedule += sched
+        if schedulable:
+            sched = executor(critical_group, g)
+            if profile is not None:
+                profile.lap('edf')
+            coalesced = coalesce_blocks(sched)
+            if profile is not None:
+                profile.lap('coalesce')
+            yield g, critical_group, coalesced
+        else:
+            sched = []
+            yield g, critical_group, None
 
+        if profile is not None:
+            profile.resume()
         # Revise deadlines and arrival times for remaining tasks
         for t in task_set:
             if t.b > a and t.b <= b:
@@ -179,5 +446,54 @@ def schedule(initial_task_set):
                     t.a = b
                 else:
                     t.b = a
-    # Return a list of scheduling blocks
-    return f_schedule
+        if profile is not None:
+            profile.lap('revision')
+            profile.end_round(g, critical_group, sched)
+
+
+def _collect_rounds(task_set, finder, executor, on_round, skip_infeasible):
+    result = ScheduleResult()
+    for g, critical_group, sched in schedule_rounds(task_set, finder, executor, skip_infeasible):
+        if on_round is not None:
+            on_round(g, critical_group, sched)
+        if sched is None:
+            result.infeasible.append((g, frozenset(critical_group)))
+        else:
+            result.groups.append((g, frozenset(critical_group)))
+            result.blocks += sched
+    return result
+
+
+def schedule(initial_task_set, finder=find_critical_group_sweep, executor=edf_events,
+             on_round=None):
+    """
+    Main scheduling algorithm.
+
+    finder is the critical group engine, find_critical_group being the
+    reference implementation. Pass a critical.IncrementalCriticalGroupFinder
+    instance to reuse the interval intensities between rounds. executor
+    runs each critical group at its speed, edf being the unit-tick
+    reference.
+
+    Returns a ScheduleResult. Unschedulable groups are recorded in its
+    infeasible list and the remaining tasks are still scheduled. If given,
+    on_round(g, critical_group, blocks) is called after every round, with
+    None for the blocks of an unschedulable group. The tasks are revised
+    in place.
+    """
+    task_set = set(initial_task_set)
+    return _collect_rounds(task_set, finder, executor, on_round, True)
+
+
+def solve(tasks, finder=find_critical_group_sweep, executor=edf_events, on_round=None):
+    """
+    Schedules tasks without modifying them.
+
+    tasks can be any iterable of tasks, such as a columns.TaskTable, and
+    is only read, so the same workload can be solved any number of times.
+    The blocks and groups of the returned ScheduleResult refer to private
+    copies of the tasks. on_round is called after every round as in
+    schedule(). Raises SchedulingError if a group is unschedulable.
+    """
+    task_set = set(Task(t.name, t.a, t.b, t.r) for t in tasks)
+    return _collect_rounds(task_set, finder, executor, on_round, False)
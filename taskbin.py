@@ -0,0 +1,137 @@
+"""
+Binary task set format.
+
+A file starts with a 24 byte little-endian header (magic, version, task
+count and size of the name table) followed by the a, b and r columns as
+64-bit integers, the n + 1 offsets of the names as 64-bit integers and the
+UTF-8 encoded names. Reading maps the file into memory, so opening even a
+very large workload is immediate and processes share the pages.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from glob import glob
+
+from columns import TaskTable, load_task_table
+
+MAGIC = b"YDST"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQ")
+EXTENSION = ".ydst"
+
+
+class _NameTable(object):
+    """
+    Task names decoded on access from the mapped name table.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+def _column(buf, typecode):
+    if sys.byteorder == "little":
+        return buf.cast(typecode)
+    column = array(typecode, buf.tobytes())
+    column.byteswap()
+    return column
+
+
+def write_tasks(filename, tasks):
+    """
+    Writes tasks, a TaskTable or any iterable of tasks, to the given file.
+    """
+    if not isinstance(tasks, TaskTable):
+        tasks = TaskTable.from_tasks(tasks)
+
+    names = [name.encode("utf-8") for name in tasks.names]
+    offsets = array("q", [0])
+    for name in names:
+        offsets.append(offsets[-1] + len(name))
+
+    with open(filename, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, len(tasks), offsets[-1]))
+        for column in (tasks.a, tasks.b, tasks.r, offsets):
+            column = array("q", column)
+            if sys.byteorder != "little":
+                column.byteswap()
+            file.write(column.tobytes())
+        for name in names:
+            file.write(name)
+
+
+def is_task_binary(filename):
+    with open(filename, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def open_task_table(filename):
+    """
+    Memory-maps the given file as a TaskTable. The columns are read-only
+    views of the mapped file.
+    """
+    with open(filename, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapped) < HEADER.size:
+        raise ValueError("{} is truncated".format(filename))
+    view = memoryview(mapped)
+    magic, version, _, num_tasks, names_size = HEADER.unpack_from(mapped)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("{} is not a version {} task file".format(filename, VERSION))
+    size = HEADER.size + 8 * (4 * num_tasks + 1) + names_size
+    if len(mapped) < size:
+        raise ValueError("{} is truncated, expected {} bytes, found {}".format(filename, size,
+                                                                            len(mapped)))
+
+    pos = HEADER.size
+    columns = []
+    for length in (num_tasks, num_tasks, num_tasks, num_tasks + 1):
+        columns.append(_column(view[pos:pos + 8 * length], "q"))
+        pos += 8 * length
+    a, b, r, offsets = columns
+
+    names = _NameTable(offsets, view[pos:pos + names_size])
+    table = TaskTable(names, a, b, r)
+    table.mapped = mapped
+    return table
+
+
+def load_tasks(filename):
+    """
+    Loads tasks from the given binary file, like scheduler.load_tasks.
+    """
+    table = open_task_table(filename)
+    return table.tasks(), len(table)
+
+
+def convert(source, destination):
+    """
+    Converts a text task file to the binary format.
+    """
+    table, num_tasks = load_task_table(source)
+    write_tasks(destination, table)
+    return len(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert task files to the binary task set format.")
+    parser.add_argument('sources', nargs='+', help='Task files or glob patterns, e.g. testcases/*.txt')
+    parser.add_argument('-o', '--output', help='Directory to write to, next to each source by default')
+    args = parser.parse_args()
+
+    for pattern in args.sources:
+        for source in sorted(glob(pattern)) or [pattern]:
+            base = os.path.splitext(os.path.basename(source))[0] + EXTENSION
+            destination = os.path.join(args.output or os.path.dirname(source), base)
+            print("{} -> {} ({} tasks)".format(source, destination, convert(source, destination)))
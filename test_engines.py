@@ -0,0 +1,100 @@
+"""
+Checks the critical group engines and EDF executors against the reference
+implementations on seeded random task sets.
+
+    python -m pytest -q
+"""
+import random
+import unittest
+
+from critical import (IncrementalCriticalGroupFinder, find_critical_group_numpy,
+                      find_critical_group_sweep, numpy)
+from scheduler import Task, check_critical_group, edf, edf_events, schedule
+from workloads import WORKLOADS
+
+SEEDS = range(50)
+
+
+def random_tasks(seed, max_tasks=30, horizon=40):
+    """
+    Returns a set of tasks with many shared releases and deadlines, so that
+    ties between intervals are common.
+    """
+    rng = random.Random(seed)
+    tasks = set()
+    for i in range(rng.randint(1, max_tasks)):
+        r = rng.randint(1, 6)
+        a = rng.randint(0, horizon)
+        tasks.add(Task("T{}".format(i + 1), a, a + r + rng.randint(0, 10), r))
+    return tasks
+
+
+def copy_tasks(tasks):
+    return [Task(t.name, t.a, t.b, t.r) for t in tasks]
+
+
+def run_time_per_task(f_schedule):
+    run_time = {}
+    for sb in f_schedule:
+        run_time[sb.task.name] = run_time.get(sb.task.name, 0) + sb.duration
+    return run_time
+
+
+class CriticalGroupTest(unittest.TestCase):
+
+    def test_sweep_matches_reference(self):
+        for seed in SEEDS:
+            self.assertTrue(check_critical_group(random_tasks(seed), find_critical_group_sweep),
+                            "seed {}".format(seed))
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy_matches_reference(self):
+        for seed in SEEDS:
+            self.assertTrue(check_critical_group(random_tasks(seed), find_critical_group_numpy),
+                            "seed {}".format(seed))
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy_in_blocks_matches_sweep(self):
+        for seed in SEEDS:
+            tasks = random_tasks(seed)
+            self.assertEqual(find_critical_group_numpy(tasks, max_cells=16),
+                             find_critical_group_sweep(tasks), "seed {}".format(seed))
+
+    def test_workloads_match_reference(self):
+        for name, workload in sorted(WORKLOADS.items()):
+            self.assertTrue(check_critical_group(set(workload(60, 1))), name)
+
+    def test_incremental_rounds_match_sweep(self):
+        for seed in SEEDS:
+            finder = IncrementalCriticalGroupFinder()
+
+            def checked(task_set):
+                # Both engines see the same set, so they break ties alike
+                expected = find_critical_group_sweep(task_set)
+                self.assertEqual(finder(task_set), expected, "seed {}".format(seed))
+                return expected
+
+            schedule(random_tasks(seed), finder=checked)
+
+
+class EdfTest(unittest.TestCase):
+
+    def test_edf_events_does_the_work_of_edf(self):
+        for seed in SEEDS:
+            tasks = random_tasks(seed)
+            g, group = find_critical_group_sweep(tasks)
+            # Both run every block at speed g, so equal run times mean equal work
+            expected = run_time_per_task(edf(set(copy_tasks(group)), g))
+            f_schedule = edf_events(group, g)
+            self.assertEqual(run_time_per_task(f_schedule), expected, "seed {}".format(seed))
+            self.assertTrue(all(sb.execution_speed == g for sb in f_schedule))
+
+    def test_edf_events_leaves_tasks_untouched(self):
+        tasks = random_tasks(0)
+        before = [(t.name, t.a, t.b, t.r) for t in tasks]
+        edf_events(tasks, 0.5)
+        self.assertEqual([(t.name, t.a, t.b, t.r) for t in tasks], before)
+
+
+if __name__ == "__main__":
+    unittest.main()
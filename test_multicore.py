@@ -0,0 +1,138 @@
+"""
+Checks the blocks of multicore.schedule_multicore on seeded random task
+sets.
+
+    python -m pytest -q
+"""
+import random
+import unittest
+from fractions import Fraction
+
+from multicore import schedule_multicore
+from scheduler import SchedulingError, Task
+
+SEEDS = range(40)
+
+
+def random_tasks(seed, cores, max_tasks=12, horizon=30):
+    """
+    Returns a list of tasks about as dense as cores processors can run.
+    """
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(rng.randint(1, max_tasks * cores)):
+        r = rng.randint(1, 6)
+        a = rng.randint(0, horizon)
+        tasks.append(Task("T{}".format(i + 1), a, a + r + rng.randint(0, 3 * r), r))
+    return tasks
+
+
+def solved(seed, cores):
+    """
+    Returns the tasks and schedule of a random set, or None if the set
+    cannot be scheduled on that many cores.
+    """
+    tasks = random_tasks(seed, cores)
+    try:
+        return tasks, schedule_multicore(tasks, cores)
+    except SchedulingError:
+        return None
+
+
+def exact_energy(f_schedule):
+    return sum(Fraction(sb.duration) * Fraction(sb.execution_speed) ** 3 for sb in f_schedule)
+
+
+def yds_energy(tasks):
+    """
+    Returns the energy of the YDS schedule of tasks at cubic power. Each
+    round takes the densest interval and cuts it out of the time line, so
+    unlike the revision step of scheduler.schedule_rounds the result is
+    the single processor minimum.
+    """
+    jobs = [(t.a, t.b, t.r) for t in tasks]
+    total = 0
+    while jobs:
+        best = None
+        for a in set(job[0] for job in jobs):
+            for b in set(job[1] for job in jobs):
+                work = sum(r for ja, jb, r in jobs if a <= ja and jb <= b)
+                if b > a and work and (best is None or Fraction(work, b - a) > best[0]):
+                    best = (Fraction(work, b - a), a, b, work)
+        g, a, b, work = best
+        total += work * g ** 2
+
+        def squeeze(t):
+            return t if t <= a else (a if t <= b else t - (b - a))
+
+        jobs = [(squeeze(ja), squeeze(jb), r) for ja, jb, r in jobs if not (a <= ja and jb <= b)]
+    return total
+
+
+def overlapping(blocks):
+    """
+    Returns the first two blocks of the list that overlap in time, or None.
+    """
+    blocks = sorted(blocks, key=lambda x: x.start)
+    for first, second in zip(blocks, blocks[1:]):
+        if second.start < first.start + first.duration:
+            return first, second
+    return None
+
+
+class MulticoreTest(unittest.TestCase):
+
+    def schedules(self):
+        count = 0
+        for cores in (1, 2, 3):
+            for seed in SEEDS:
+                outcome = solved(seed, cores)
+                if outcome is not None:
+                    count += 1
+                    yield cores, seed, outcome[0], outcome[1]
+        # Make sure the random sets are not all rejected
+        self.assertGreater(count, len(SEEDS))
+
+    def test_work_is_done(self):
+        for cores, seed, tasks, result in self.schedules():
+            work = dict((task, 0) for task in tasks)
+            for sb in result.blocks:
+                work[sb.task] += sb.duration * sb.execution_speed
+            for task in tasks:
+                self.assertEqual(work[task], task.r, "{} cores, seed {}, {}".format(cores, seed, task))
+
+    def test_blocks_stay_in_task_intervals(self):
+        for cores, seed, tasks, result in self.schedules():
+            for sb in result.blocks:
+                self.assertTrue(sb.task.a <= sb.start and sb.start + sb.duration <= sb.task.b,
+                                "{} cores, seed {}, {}".format(cores, seed, sb.task))
+                self.assertTrue(0 <= sb.core < cores)
+
+    def test_no_overlap_on_a_core(self):
+        for cores, seed, tasks, result in self.schedules():
+            for core in range(cores):
+                self.assertIsNone(overlapping([sb for sb in result.blocks if sb.core == core]),
+                                  "{} cores, seed {}, core {}".format(cores, seed, core))
+
+    def test_no_task_on_two_cores_at_once(self):
+        for cores, seed, tasks, result in self.schedules():
+            for task in tasks:
+                self.assertIsNone(overlapping([sb for sb in result.blocks if sb.task is task]),
+                                  "{} cores, seed {}, {}".format(cores, seed, task))
+
+    def test_one_core_matches_yds_energy(self):
+        for seed in SEEDS:
+            outcome = solved(seed, 1)
+            if outcome is None:
+                continue
+            tasks, result = outcome
+            self.assertEqual(exact_energy(result.blocks), yds_energy(tasks), "seed {}".format(seed))
+
+    def test_rejects_fewer_than_one_core(self):
+        tasks = random_tasks(0, 1)
+        for cores in (0, -1):
+            self.assertRaises(ValueError, schedule_multicore, tasks, cores)
+
+
+if __name__ == "__main__":
+    unittest.main()
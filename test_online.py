@@ -0,0 +1,60 @@
+"""
+Checks the blocks of the online policies on seeded random task sets.
+
+    python -m pytest -q
+"""
+import random
+import unittest
+
+from online import POLICIES
+from scheduler import Task
+
+SEEDS = range(60)
+
+
+def random_arrivals(seed, max_tasks=25, horizon=40):
+    """
+    Returns a list of tasks in order of release.
+    """
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(rng.randint(1, max_tasks)):
+        r = rng.randint(1, 6)
+        a = rng.randint(0, horizon)
+        tasks.append(Task("T{}".format(i + 1), a, a + rng.randint(1, 3 * r), r))
+    return sorted(tasks, key=lambda x: x.a)
+
+
+class OnlineTest(unittest.TestCase):
+
+    def schedules(self):
+        for name, policy in sorted(POLICIES.items()):
+            for seed in SEEDS:
+                tasks = random_arrivals(seed)
+                yield name, seed, tasks, list(policy(iter(tasks)))
+
+    def test_work_is_done_within_task_intervals(self):
+        for name, seed, tasks, blocks in self.schedules():
+            work = dict((task, 0) for task in tasks)
+            for sb in blocks:
+                self.assertTrue(sb.task.a <= sb.start and sb.start + sb.duration <= sb.task.b,
+                                "{}, seed {}, {}".format(name, seed, sb.task))
+                work[sb.task] += sb.duration * sb.execution_speed
+            for task in tasks:
+                self.assertEqual(work[task], task.r, "{}, seed {}, {}".format(name, seed, task))
+
+    def test_blocks_do_not_overlap(self):
+        for name, seed, tasks, blocks in self.schedules():
+            blocks = sorted(blocks, key=lambda x: x.start)
+            for first, second in zip(blocks, blocks[1:]):
+                self.assertLessEqual(first.start + first.duration, second.start,
+                                     "{}, seed {}".format(name, seed))
+
+    def test_rejects_arrivals_out_of_order(self):
+        tasks = [Task("T1", 5, 9, 1), Task("T2", 2, 9, 1)]
+        for name, policy in sorted(POLICIES.items()):
+            self.assertRaises(ValueError, list, policy(iter(tasks)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Checks reading and writing of the text and binary task file formats.
+
+    python -m pytest -q
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import taskbin
+from scheduler import Task, load_tasks
+from workloads import uniform, write_task_file
+
+
+def as_tuples(tasks):
+    return [(t.name, t.a, t.b, t.r) for t in tasks]
+
+
+class TaskFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data):
+        filename = os.path.join(self.directory, name)
+        with open(filename, 'wb' if isinstance(data, bytes) else 'w') as file:
+            file.write(data)
+        return filename
+
+
+class TextFormatTest(TaskFileTest):
+
+    def test_round_trip(self):
+        tasks = uniform(200, 3)
+        filename = os.path.join(self.directory, 'tasks.txt')
+        write_task_file(filename, tasks)
+        loaded, num_tasks = load_tasks(filename)
+        self.assertEqual(num_tasks, len(tasks))
+        self.assertEqual(as_tuples(loaded), as_tuples(tasks))
+
+    def test_bad_header(self):
+        filename = self.write('tasks.txt', "x\nT1 (0, 5, 1)\n")
+        with self.assertRaisesRegex(ValueError, "line 1"):
+            load_tasks(filename)
+
+    def test_empty_file(self):
+        filename = self.write('tasks.txt', "")
+        self.assertRaises(ValueError, load_tasks, filename)
+
+    def test_count_mismatch(self):
+        filename = self.write('tasks.txt', "3\nT1 (0, 5, 1)\nT2 (1, 4, 2)\n")
+        with self.assertRaisesRegex(ValueError, "expected 3 tasks, found 2"):
+            load_tasks(filename)
+
+    def test_bad_line_is_named(self):
+        filename = self.write('tasks.txt', "3\nT1 (0, 5, 1)\n\nT2 (1, 4)\nT3 (2, 6, 1)\n")
+        with self.assertRaisesRegex(ValueError, r"line 4: T2 \(1, 4\)"):
+            load_tasks(filename)
+
+    def test_blank_lines_are_skipped(self):
+        filename = self.write('tasks.txt', "2\nT1 (0, 5, 1)\n\nT2 (1, 4, 2)\n")
+        self.assertEqual(as_tuples(load_tasks(filename)[0]), [('T1', 0, 5, 1), ('T2', 1, 4, 2)])
+
+
+class BinaryFormatTest(TaskFileTest):
+
+    def test_round_trip(self):
+        tasks = uniform(200, 3) + [Task("Té中", 5, 10 ** 12, 7)]
+        filename = os.path.join(self.directory, 'tasks' + taskbin.EXTENSION)
+        taskbin.write_tasks(filename, tasks)
+        self.assertTrue(taskbin.is_task_binary(filename))
+        loaded, num_tasks = taskbin.load_tasks(filename)
+        self.assertEqual(num_tasks, len(tasks))
+        self.assertEqual(as_tuples(loaded), as_tuples(tasks))
+
+    def test_truncated_file(self):
+        filename = os.path.join(self.directory, 'tasks' + taskbin.EXTENSION)
+        taskbin.write_tasks(filename, uniform(20, 3))
+        with open(filename, 'rb') as file:
+            data = file.read()
+        for size in (len(taskbin.MAGIC), taskbin.HEADER.size, taskbin.HEADER.size + 40, len(data) - 1):
+            truncated = self.write('truncated' + taskbin.EXTENSION, data[:size])
+            with self.assertRaisesRegex(ValueError, "truncated"):
+                taskbin.load_tasks(truncated)
+
+    def test_bad_header(self):
+        data = taskbin.HEADER.pack(taskbin.MAGIC, taskbin.VERSION + 1, 0, 0, 0) + b"\0" * 8
+        filename = self.write('tasks' + taskbin.EXTENSION, data)
+        with self.assertRaisesRegex(ValueError, "not a version"):
+            taskbin.load_tasks(filename)
+
+    def test_text_file_is_not_binary(self):
+        filename = self.write('tasks.txt', "1\nT1 (0, 5, 1)\n")
+        self.assertFalse(taskbin.is_task_binary(filename))
+
+
+if __name__ == "__main__":
+    unittest.main()
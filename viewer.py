@@ -0,0 +1,124 @@
+"""
+Interactive schedule viewer.
+
+Controls:
+    + / Up       zoom in around the centre of the view
+    - / Down     zoom out
+    Left / Right pan by a quarter of the view
+    Home         show the whole schedule
+    click        zoom in around the clicked time
+    q / Escape   quit
+"""
+from __future__ import division
+
+from graphics import update
+from plotter import SchedulePlotter
+
+ZOOM = 2
+PAN = 0.25
+# Narrowest view in time units
+MIN_SPAN = 1
+FRAME_RATE = 30
+
+ZOOM_IN_KEYS = ('plus', 'equal', 'KP_Add', 'Up')
+ZOOM_OUT_KEYS = ('minus', 'KP_Subtract', 'Down')
+QUIT_KEYS = ('q', 'Escape')
+
+
+class ScheduleViewer(SchedulePlotter):
+    """
+    Schedule chart that can be zoomed and panned. Every change of the view
+    clears the window and draws only the blocks overlapping the new view,
+    found by bisection in the per-row index of the layout.
+    """
+
+    def __init__(self, schedule, num_tasks, max_x=100, max_y=100, lod=True, cores=None):
+        SchedulePlotter.__init__(self, schedule, num_tasks, max_x, max_y, lod, cores)
+        self.shapes = []
+        self.window.setMouseHandler(self._on_click)
+        self._clicked = None
+
+    def set_view(self, t0, t1):
+        """
+        Sets the visible time window, clamped to the schedule.
+        """
+        end = self.schedule_end
+        span = min(max(t1 - t0, min(MIN_SPAN, end)), end)
+        t0 = max(0, min(t0, end - span))
+        self.view = (t0, t0 + span)
+
+    def zoom(self, factor, centre=None):
+        t0, t1 = self.view
+        if centre is None:
+            centre = (t0 + t1) / 2
+        span = (t1 - t0) / factor
+        self.set_view(centre - span / 2, centre + span / 2)
+
+    def pan(self, fraction):
+        t0, t1 = self.view
+        shift = (t1 - t0) * fraction
+        self.set_view(t0 + shift, t1 + shift)
+
+    def time_at(self, x):
+        """
+        Returns the time under the world x coordinate.
+        """
+        t0, t1 = self.view
+        interval = (self.max_x - 2*self.margin) / (t1 - t0)
+        return t0 + (x - self.margin) / interval
+
+    def redraw(self):
+        self.clear()
+        for item in self.items():
+            self.shapes.append(self._draw_item(item))
+        self.window.flush()
+
+    def clear(self):
+        # Deleting everything at once is far cheaper than undrawing each
+        # shape, which removes it from the window's item list one by one
+        self.window.delete('all')
+        self.window.items = []
+        for shape in self.shapes:
+            shape.canvas = None
+            shape.id = None
+        self.shapes = []
+
+    def _on_click(self, point):
+        # Called from Tk with screen coordinates, handled in the main loop
+        self._clicked = self.window.toWorld(point.x, point.y)
+
+    def handle_key(self, key):
+        """
+        Applies a key press to the view, returning False to quit.
+        """
+        if key in QUIT_KEYS:
+            return False
+        if key in ZOOM_IN_KEYS:
+            self.zoom(ZOOM)
+        elif key in ZOOM_OUT_KEYS:
+            self.zoom(1 / ZOOM)
+        elif key == 'Left':
+            self.pan(-PAN)
+        elif key == 'Right':
+            self.pan(PAN)
+        elif key == 'Home':
+            self.set_view(0, self.schedule_end)
+        return True
+
+    def run(self):
+        """
+        Shows the schedule until the window is closed or q is pressed.
+        """
+        self.redraw()
+        while not self.window.isClosed():
+            view = self.view
+            if not self.handle_key(self.window.checkKey()):
+                break
+            if self._clicked is not None:
+                x, y = self._clicked
+                self._clicked = None
+                self.zoom(ZOOM, self.time_at(x))
+            if self.view != view:
+                self.redraw()
+            update(FRAME_RATE)
+        self.window.close()
@@ -0,0 +1,96 @@
+"""
+Seeded generators of synthetic task sets.
+
+Every generator takes the number of tasks, a seed and the target
+utilization, the share of the time line the work would fill at speed 1,
+and returns the same list of tasks for the same arguments:
+
+    uniform       releases spread evenly over the horizon
+    bursty        tasks released in bursts sharing a long window
+    nested        clusters of intervals nested inside each other
+    long_horizon  few, long tasks with times up to 10^9
+"""
+from __future__ import division
+
+import argparse
+import random
+
+from scheduler import Task
+
+
+def uniform(n, seed=0, utilization=0.5):
+    rng = random.Random(seed)
+    horizon = max(1, int(n * 5 / utilization))
+    tasks = []
+    for i in range(n):
+        r = rng.randint(1, 9)
+        a = rng.randrange(horizon)
+        tasks.append(Task("T{}".format(i + 1), a, a + 2 * r + rng.randint(0, 4 * r), r))
+    return tasks
+
+
+def bursty(n, seed=0, utilization=0.5, burst_size=50):
+    rng = random.Random(seed)
+    window = int(burst_size * 5 / utilization)
+    bursts = max(1, n // burst_size)
+    tasks = []
+    for i in range(n):
+        r = rng.randint(1, 9)
+        a = rng.randrange(bursts) * window + rng.randint(0, 5)
+        tasks.append(Task("T{}".format(i + 1), a, a + 2 * r + rng.randint(0, window), r))
+    return tasks
+
+
+def nested(n, seed=0, utilization=0.5, depth=20):
+    rng = random.Random(seed)
+    tasks = []
+    centre = 0
+    while len(tasks) < n:
+        size = min(depth, n - len(tasks))
+        width = rng.randint(2, 10)
+        centre += size * width + rng.randint(1, width)
+        r = max(1, int(2 * width * utilization))
+        for k in range(1, size + 1):
+            tasks.append(Task("T{}".format(len(tasks) + 1), centre - k * width,
+                              centre + k * width, r))
+        centre += size * width
+    return tasks
+
+
+def long_horizon(n, seed=0, utilization=0.5):
+    rng = random.Random(seed)
+    horizon = 10 ** 9
+    mean = horizon * utilization / max(1, n)
+    tasks = []
+    for i in range(n):
+        r = max(1, int(rng.uniform(0.5, 1.5) * mean))
+        a = rng.randrange(horizon)
+        tasks.append(Task("T{}".format(i + 1), a, a + 2 * r + rng.randint(0, 4 * r), r))
+    return tasks
+
+
+WORKLOADS = {'uniform': uniform, 'bursty': bursty, 'nested': nested,
+             'long_horizon': long_horizon}
+
+
+def write_task_file(filename, tasks):
+    """
+    Writes tasks in the text format read by scheduler.load_tasks.
+    """
+    with open(filename, "w") as file:
+        file.write("{}\n".format(len(tasks)))
+        for task in tasks:
+            file.write("{} ({}, {}, {})\n".format(task.name, task.a, task.b, task.r))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic task file.")
+    parser.add_argument('workload', choices=sorted(WORKLOADS))
+    parser.add_argument('num_tasks', type=int)
+    parser.add_argument('filename')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--utilization', type=float, default=0.5)
+    args = parser.parse_args()
+
+    write_task_file(args.filename, WORKLOADS[args.workload](args.num_tasks, args.seed,
+                                                            args.utilization))